@@ -0,0 +1,5 @@
+# Навантажувальні тести: /submit, обробка оновлень диспетчером і затримка сповіщень
+# Запуск: python -m benchmarks [submit|dispatcher|notify|all] (див. python -m benchmarks -h)
+from .stats import percentile, report
+
+__all__ = ["percentile", "report"]
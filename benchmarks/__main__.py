@@ -0,0 +1,82 @@
+# Точка входу: python -m benchmarks [submit|dispatcher|notify|all|commit]
+import argparse
+import asyncio
+import os
+import tempfile
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(
+        prog="python -m benchmarks",
+        description="Навантажувальні тести бота та веб-сервера з фейковим Telegram Bot API",
+    )
+    parser.add_argument("suite", nargs="?", default="all", choices=["submit", "dispatcher", "notify", "all", "commit"])
+    parser.add_argument("--database", help="Файл БД (за замовчуванням — новий тимчасовий файл)")
+    parser.add_argument("--requests", type=int, default=2000, help="Кількість запитів до /submit")
+    parser.add_argument("--concurrency", type=int, default=16, help="Паралельних запитів / оновлень")
+    parser.add_argument("--users", type=int, default=50, help="Користувачів бота")
+    parser.add_argument("--rounds", type=int, default=20, help="Оновлень від кожного користувача")
+    parser.add_argument("--entries", type=int, default=100, help="Записів для тесту сповіщень")
+    parser.add_argument("--subscribers", type=int, default=1, help="Підписників для тесту сповіщень")
+    parser.add_argument("--rate", type=float, default=20.0, help="Записів за секунду в тесті сповіщень (0 — без пауз)")
+    parser.add_argument("--timeout", type=float, default=60.0, help="Очікування останніх сповіщень (секунди)")
+    parser.add_argument("--telegram-limits", action="store_true",
+                        help="Залишити ліміти розсилки Telegram (FANOUT_*_RATE) замість необмеженої відправки")
+    parser.add_argument("--api-latency", type=float, default=0.0, help="Затримка відповіді фейкового API (секунди)")
+    return parser.parse_args()
+
+
+async def run_bot_suites(args, results: dict):
+    """Тести, що працюють з ботом: одна сесія event loop на всі."""
+    import bot
+    from container import AppContainer
+    from .fake_api import FakeSession
+    from .dispatcher import bench_dispatcher
+    from .notify import bench_notify
+
+    bot.bot.session = FakeSession(latency=args.api_latency)  # Жодних запитів до Telegram
+    container = AppContainer(pool_size=1)
+    dp = bot.create_dispatcher(container)
+    await container.startup()  # Без хуків диспетчера: notify_new_entries запускає лише тест сповіщень
+
+    if args.suite in ("dispatcher", "all"):
+        results["dispatcher"] = await bench_dispatcher(dp, bot.bot, args.users, args.rounds, args.concurrency)
+    if args.suite in ("notify", "all"):
+        results["notify"] = await bench_notify(bot, container, args.entries, args.subscribers,
+                                               args.rate, args.timeout)
+
+    await bot.fanout.stop()
+    await container.shutdown()
+
+
+def main():
+    args = parse_args()
+
+    # Налаштування читаються з оточення під час імпорту config, тож задаємо їх до імпорту модулів проєкту
+    database = args.database or os.path.join(tempfile.mkdtemp(prefix="bench-"), "entries.db")
+    os.environ["DATABASE"] = database
+    os.environ.setdefault("BOT_TOKEN", "123456:benchmark")
+    os.environ.setdefault("ACCESS_CODE", "benchmark")
+    # Усі запити йдуть з однієї адреси і кількох чатів — обмеження частоти зняті
+    for name in ("SUBMIT_RATE_LIMIT", "THROTTLE_UPDATES", "LOGIN_ATTEMPTS"):
+        os.environ.setdefault(name, "0")
+    if not args.telegram_limits:
+        os.environ.setdefault("FANOUT_GLOBAL_RATE", "1000000")
+        os.environ.setdefault("FANOUT_CHAT_RATE", "1000000")
+    print(f"🗄 База даних: {database}")
+
+    results = {}
+    if args.suite == "commit":  # Порівняння режимів запису /submit (окремо від "all")
+        from .submit import bench_commit
+        results["commit"] = bench_commit(args.requests, args.concurrency)
+        return results
+    if args.suite in ("submit", "all"):
+        from .submit import bench_submit
+        results["submit"] = bench_submit(args.requests, args.concurrency)
+    if args.suite != "submit":
+        asyncio.run(run_bot_suites(args, results))
+    return results
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+# Навантаження на диспетчер aiogram: синтетичні оновлення через роутери з handlers/
+import asyncio
+from itertools import count
+from time import perf_counter, time
+from aiogram import Bot, Dispatcher
+from aiogram.types import Update
+from .stats import report
+
+# Типові дії авторизованого користувача (по черзі для кожного оновлення)
+DISPATCHER_TEXTS = ["📋 Записи", "/status", "/search bench", "ℹ️ Допомога"]
+
+_update_ids = count(1)
+
+
+def make_update(chat_id: int, text: str) -> Update:
+    """Формує оновлення з текстовим повідомленням від користувача chat_id."""
+    update_id = next(_update_ids)
+    return Update.model_validate({
+        "update_id": update_id,
+        "message": {
+            "message_id": update_id,
+            "date": int(time()),
+            "chat": {"id": chat_id, "type": "private"},
+            "from": {"id": chat_id, "is_bot": False, "first_name": "Bench", "username": f"bench{chat_id}"},
+            "text": text,
+        },
+    }, context={"bot": None})
+
+
+async def bench_dispatcher(dp: Dispatcher, bot: Bot, users: int, rounds: int, concurrency: int) -> dict:
+    """
+    Реєструє users користувачів через /start і пароль, після чого подає
+    users × rounds оновлень (DISPATCHER_TEXTS по колу) з concurrency одночасно.
+    Вимірюється повна обробка оновлення: middleware, фільтри, обробник, запити до БД
+    та відповіді у фейковий Bot API.
+    :param dp: Диспетчер з bot.create_dispatcher
+    :param bot: Бот з підміненою сесією (див. __main__.py)
+    :param users: Кількість користувачів
+    :param rounds: Скільки оновлень надсилає кожен користувач
+    :param concurrency: Максимум оновлень в обробці одночасно
+    """
+    from config import ACCESS_CODE
+
+    chat_ids = [100000 + i for i in range(users)]
+    for chat_id in chat_ids:  # Авторизація не входить у вимірювання
+        for text in ("/start", ACCESS_CODE):
+            await dp.feed_update(bot, make_update(chat_id, text))
+
+    updates = [
+        (chat_id, DISPATCHER_TEXTS[i % len(DISPATCHER_TEXTS)])
+        for i in range(rounds) for chat_id in chat_ids
+    ]
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies = []
+    errors = 0
+
+    async def feed(chat_id: int, text: str):
+        nonlocal errors
+        async with semaphore:
+            started = perf_counter()
+            try:
+                await dp.feed_update(bot, make_update(chat_id, text))
+            except Exception as e:
+                errors += 1
+                print(f"Помилка обробки «{text}»: {e}")
+                return
+            latencies.append(perf_counter() - started)
+
+    started = perf_counter()
+    await asyncio.gather(*(feed(chat_id, text) for chat_id, text in updates))
+    elapsed = perf_counter() - started
+    return report(f"Диспетчер ×{concurrency}", latencies, elapsed, "оновлень", errors)
@@ -0,0 +1,64 @@
+# Локальна заміна Telegram Bot API: відповідає одразу й записує час кожного виклику
+import asyncio
+import json
+from time import perf_counter, time
+from aiogram.client.session.base import BaseSession
+from aiogram.types import InputFile, Message, User
+
+
+class FakeSession(BaseSession):
+    """
+    Сесія бота, що не ходить у мережу.
+    Кожен виклик API зберігається в self.calls як (метод, chat_id, текст, час perf_counter),
+    а відповідь формується за типом, який очікує метод.
+    """
+
+    def __init__(self, latency: float = 0.0, **kwargs):
+        """
+        :param latency: Штучна затримка відповіді «сервера» (секунди)
+        """
+        super().__init__(**kwargs)
+        self.latency = latency
+        self.calls = []
+        self.message_id = 0
+
+    async def make_request(self, bot, method, timeout=None):
+        if self.latency:
+            await asyncio.sleep(self.latency)
+
+        # Файли вичитуємо повністю, як це зробила б справжня сесія
+        for field in type(method).model_fields:
+            value = getattr(method, field)
+            if isinstance(value, InputFile):
+                async for _ in value.read(bot):
+                    pass
+
+        chat_id = getattr(method, "chat_id", None)
+        self.calls.append((type(method).__name__, chat_id, getattr(method, "text", None), perf_counter()))
+        content = json.dumps({"ok": True, "result": self.fake_result(method, chat_id)})
+        return self.check_response(bot, method, 200, content).result
+
+    def fake_result(self, method, chat_id):
+        """Формує результат виклику у форматі Bot API."""
+        returning = method.__returning__
+        if returning is Message:
+            self.message_id += 1
+            return {
+                "message_id": self.message_id,
+                "date": int(time()),
+                "chat": {"id": chat_id or 0, "type": "private"},
+                "text": getattr(method, "text", None) or "",
+            }
+        if returning is User:
+            return {"id": 1, "is_bot": True, "first_name": "Benchmark"}
+        return True
+
+    async def stream_content(self, url, headers=None, timeout=30, chunk_size=65536, raise_for_status=True):
+        yield b""
+
+    async def close(self):
+        pass
+
+    def sent_messages(self) -> list:
+        """Повертає лише надіслані повідомлення (SendMessage)."""
+        return [call for call in self.calls if call[0] == "SendMessage"]
@@ -0,0 +1,70 @@
+# Затримка сповіщень: від вставки через /submit до відправки в Telegram
+import asyncio
+import re
+from time import perf_counter, time
+from .stats import report
+
+NAME_PATTERN = re.compile(r"Ім'я: (notify-\d+)")  # Ім'я запису в тексті сповіщення
+
+
+async def bench_notify(app, container, entries: int, users: int, rate: float, timeout: float) -> dict:
+    """
+    Запускає notify_new_entries, підписує users користувачів на миттєві сповіщення
+    і додає entries записів через /submit з частотою rate за секунду.
+    Для кожної доставки рахується час від початку вставки до виклику sendMessage.
+    Ліміти FanOut за замовчуванням зняті (див. --telegram-limits у __main__.py),
+    щоб вимірювалась сама обробка, а не очікування токенів.
+    :param app: Модуль bot з підміненою сесією (див. __main__.py)
+    :param container: AppContainer, з яким працює notify_new_entries
+    :param entries: Кількість записів
+    :param users: Кількість підписників
+    :param rate: Записів за секунду (0 — без пауз)
+    :param timeout: Скільки чекати на останні доставки (секунди)
+    """
+    from server import app as server_app
+
+    session = app.bot.session
+    # Події від попередніх тестів (наприклад, /submit) не повинні потрапити у вимірювання
+    db = container.async_db
+    await db.update_data("outbox", {"delivered_at": time(), "digested_at": time()}, "delivered_at IS NULL")
+    for i in range(users):
+        await db.insert_data("users", ["chat_id", "username", "registered", "notify"],
+                             (200000 + i, f"subscriber{i}", 1, 1))
+
+    task = asyncio.create_task(app.notify_new_entries(container))
+    await asyncio.sleep(2.5)  # notify_new_entries чекає 2 с перед першою перевіркою
+    first_call = len(session.calls)
+
+    client = server_app.test_client()
+    inserted = {}
+    started = perf_counter()
+    for i in range(entries):
+        name = f"notify-{i}"
+        form = {"name": name, "email": f"{name}@example.com", "phone": f"+380{i:09d}", "type": "Бенчмарк"}
+        inserted[name] = perf_counter()
+        await asyncio.to_thread(client.post, "/submit", data=form)
+        if rate:
+            await asyncio.sleep(1 / rate)
+
+    # Чекаємо, поки всі сповіщення розійдуться
+    expected = entries * users
+    deadline = perf_counter() + timeout
+    sent = []
+    while perf_counter() < deadline:
+        sent = [call for call in session.calls[first_call:] if call[0] == "SendMessage"]
+        if len(sent) >= expected:
+            break
+        await asyncio.sleep(0.05)
+    elapsed = perf_counter() - started
+
+    task.cancel()
+    await asyncio.gather(task, return_exceptions=True)
+    await app.fanout.stop()
+
+    latencies = []
+    for _, _, text, sent_at in sent:
+        match = NAME_PATTERN.search(text or "")
+        if match and match.group(1) in inserted:
+            latencies.append(sent_at - inserted[match.group(1)])
+    return report(f"Сповіщення ({users} підписників)", latencies, elapsed, "доставок",
+                  expected - len(latencies))
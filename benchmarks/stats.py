@@ -0,0 +1,40 @@
+# Підсумкова статистика вимірювань
+
+
+def percentile(values: list, p: float) -> float:
+    """
+    Повертає p-й перцентиль (найближчий ранг).
+    :param values: Виміряні значення
+    :param p: Перцентиль від 0 до 100
+    """
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = max(0, min(len(ordered) - 1, round(p / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+def report(name: str, latencies: list, elapsed: float, unit: str = "запитів", errors: int = 0) -> dict:
+    """
+    Друкує та повертає підсумок вимірювання.
+    :param name: Назва тесту
+    :param latencies: Затримки окремих операцій (секунди)
+    :param elapsed: Загальний час тесту (секунди)
+    :param unit: Що саме рахуємо (для виводу)
+    :param errors: Кількість невдалих операцій
+    """
+    result = {
+        "count": len(latencies),
+        "errors": errors,
+        "elapsed": elapsed,
+        "rate": len(latencies) / elapsed if elapsed else 0.0,
+        "p50_ms": percentile(latencies, 50) * 1000,
+        "p99_ms": percentile(latencies, 99) * 1000,
+        "max_ms": max(latencies, default=0.0) * 1000,
+    }
+    print(
+        f"📈 {name}: {result['count']} {unit} за {elapsed:.2f} с "
+        f"({result['rate']:.1f}/с), p50 {result['p50_ms']:.1f} мс, "
+        f"p99 {result['p99_ms']:.1f} мс, max {result['max_ms']:.1f} мс, помилок: {errors}"
+    )
+    return result
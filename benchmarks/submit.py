@@ -0,0 +1,64 @@
+# Навантаження на /submit веб-сервера через тестовий клієнт Flask
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from time import perf_counter
+from .stats import report
+
+
+def bench_submit(total: int, concurrency: int, app=None, name: str = "/submit", prefix: str = "bench") -> dict:
+    """
+    Надсилає total заповнених форм з concurrency потоків одночасно.
+    Кожен потік має власний тестовий клієнт, тож запити справді паралельні,
+    як у багатопотоковому WSGI-сервері.
+    :param total: Загальна кількість запитів
+    :param concurrency: Кількість паралельних потоків
+    :param app: Застосунок Flask (за замовчуванням — server.app)
+    :param name: Назва тесту у звіті
+    :param prefix: Префікс даних форми (різні для кожного запуску, щоб форми не вважались повторами)
+    """
+    if app is None:
+        from server import app  # Імпорт після налаштування змінних оточення (див. __main__.py)
+
+    local = threading.local()
+
+    def submit(i: int):
+        if not hasattr(local, "client"):
+            local.client = app.test_client()
+        form = {"name": f"{prefix}-{i}", "email": f"{prefix}{i}@example.com", "phone": f"+380{i:09d}", "type": "Бенчмарк"}
+        started = perf_counter()
+        response = local.client.post("/submit", data=form)
+        return perf_counter() - started, "✅" in response.get_data(as_text=True)
+
+    started = perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        results = list(pool.map(submit, range(total)))
+    elapsed = perf_counter() - started
+
+    latencies = [latency for latency, ok in results if ok]
+    return report(f"{name} ×{concurrency}", latencies, elapsed, "записів", len(results) - len(latencies))
+
+
+# Режими запису для порівняння: (ключ, назва, груповий коміт, synchronous пулу)
+COMMIT_MODES = [
+    ("normal", "/submit NORMAL", False, "NORMAL"),
+    ("full", "/submit FULL", False, "FULL"),
+    ("group", "/submit FULL + груповий коміт", True, "FULL"),
+]
+
+
+def bench_commit(total: int, concurrency: int) -> dict:
+    """
+    Порівнює запис форм з окремим комітом на кожен запит і груповим комітом (DB_GROUP_COMMIT).
+    Груповий коміт комітить із synchronous=FULL (відповідь лише після fsync), тож чесна база
+    для порівняння — окремі коміти з FULL; NORMAL (без fsync на коміт) наведено для орієнтиру.
+    Базу варто тримати на справжньому диску (--database), а не в tmpfs, де fsync нічого не коштує.
+    """
+    from container import AppContainer
+    from server import create_app
+
+    results = {}
+    for key, name, group_commit, synchronous in COMMIT_MODES:
+        container = AppContainer(group_commit=group_commit, synchronous=synchronous)
+        results[key] = bench_submit(total, concurrency, create_app(container), name, prefix=f"commit-{key}")
+        container.close()
+    return results
@@ -1,90 +1,343 @@
 # Головний файл запуску бота
 import asyncio
+from functools import partial
+from time import time, monotonic
 from aiogram import Bot, Dispatcher
-from aiogram.fsm.storage.memory import MemoryStorage
-from config import BOT_TOKEN, DATABASE
-from database import Database
-from handlers import start_router, messages_router
+from aiogram.filters import ExceptionTypeFilter
+from aiogram.types import ErrorEvent
+from config import (
+    BOT_TOKEN, NOTIFY_INTERVAL, NOTIFY_BATCH_SIZE, OUTBOX_LEASE, OUTBOX_RETENTION,
+    DIGEST_WINDOW, DIGEST_MAX_ENTRIES, BOT_MODE, SUBMIT_TOKEN_TTL,
+    ARCHIVE_AFTER_DAYS, ARCHIVE_BATCH_SIZE, MAINTENANCE_INTERVAL, MAINTENANCE_QUIET, VACUUM_PAGES,
+)
+from container import AppContainer
+from database import DatabaseError
+from events import listen_new_entries
+from fanout import FanOut
+from formatting import format_entry, format_entry_line, pack_messages
+from handlers import start_router, messages_router, edit_router
+from webhook import run_webhook, start_metrics_server
+from middlewares import ProfileMiddleware, MetricsMiddleware, ThrottlingMiddleware
+from metrics import NOTIFY_LAG
+from leases import Lease, WORKER_ID, heartbeat
 
 # -----------------------------
 # Ініціалізація
 # -----------------------------
+# Ресурси БД (підключення, кеші, сховище станів) живуть у AppContainer, що створюється в main()
 bot = Bot(token=BOT_TOKEN)  # Створення екземпляру бота з токеном
-storage = MemoryStorage()  # Створення сховища станів у пам'яті
-dp = Dispatcher(storage=storage)  # Створення диспетчера з вказаним сховищем
-db = Database(DATABASE)  # Створення екземпляру бази даних
+fanout = FanOut(bot)  # Планувальник розсилки з урахуванням лімітів Telegram
+PURGE_INTERVAL = 3600  # Як часто прибирати доставлені події та застарілі ключі відправок (секунди)
 
 # -----------------------------
 # Фонова задача для сповіщень
 # -----------------------------
-async def notify_new_entries():
+async def drain_outbox(app: AppContainer):
+    """
+    Вичитує чергу сповіщень (outbox) порціями по NOTIFY_BATCH_SIZE і розсилає їх.
+    Подію позначаємо доставленою лише після розсилки, а кожну успішну відправку фіксуємо
+    в outbox_deliveries, тому після збою повторна обробка не надсилає дублікатів.
+    Порцію забирає в оренду лише один процес бота; оренда продовжується, поки порція
+    розсилається, а після збою процесу порцію за OUTBOX_LEASE секунд забирає інший.
+    """
+    db = app.async_db
+    while True:
+        batch = await db.claim_outbox(NOTIFY_BATCH_SIZE, OUTBOX_LEASE, WORKER_ID)
+        if isinstance(batch, str):  # Помилка БД
+            print(batch)
+            return
+        if not batch:
+            return
+
+        # Отримуємо користувачів з увімкненими миттєвими сповіщеннями
+        try:
+            notify_users = await app.users.subscribers(digest=False)
+        except DatabaseError as e:  # Події повернуться в чергу після закінчення оренди
+            print(e)
+            return
+
+        ids = [row[0] for row in batch]
+        async with heartbeat(partial(extend_claim, app, ids), OUTBOX_LEASE / 3):
+            delivered = await db.get_deliveries(ids)  # Одним запитом для всієї порції
+            # Ставимо сповіщення в чергу розсилки для всіх, хто їх ще не отримав
+            for row in batch:
+                outbox_id, entry = row[0], row[1:6]
+                if entry[1] is None:  # Запис видалено до розсилки
+                    continue
+                text = format_entry(entry)
+                for chat_id in notify_users:
+                    if (outbox_id, chat_id) not in delivered:
+                        fanout.send(chat_id, text, on_sent=partial(db.record_delivery, outbox_id),
+                                    parse_mode="Markdown")
+            await fanout.join()
+
+        await db.complete_outbox(ids)
+        now = time()
+        for row in batch:
+            NOTIFY_LAG.observe(now - row[6])
+        if len(batch) < NOTIFY_BATCH_SIZE:
+            return
+
+
+async def extend_claim(app: AppContainer, ids: list):
+    """Продовжує оренду порції черги, поки вона розсилається."""
+    extended = await app.async_db.extend_outbox(ids, OUTBOX_LEASE, WORKER_ID)
+    if isinstance(extended, str):
+        print(extended)
+    elif extended < len(ids):
+        print(f"⚠️ Оренду {len(ids) - extended} подій втрачено — їх може обробити інший процес")
+
+
+async def flush_digests(app: AppContainer) -> float:
+    """
+    Надсилає дайджести користувачам, що обрали цей режим: одне повідомлення зі списком
+    усіх нових записів замість окремого повідомлення на кожен запис.
+    Дайджест відправляється, коли найстаріша подія чекає DIGEST_WINDOW секунд
+    або накопичилось DIGEST_MAX_ENTRIES подій.
+    :return: Через скільки секунд варто перевірити знову (None, якщо чекати нічого)
+    """
+    db = app.async_db
+    pending = await db.select_digest(DIGEST_MAX_ENTRIES)
+    if isinstance(pending, str):  # Помилка БД
+        print(pending)
+        return None
+    if not pending:
+        return None
+
+    try:
+        digest_users = await app.users.subscribers(digest=True)
+    except DatabaseError as e:
+        print(e)
+        return None
+
+    ids = [row[0] for row in pending]
+    if digest_users:
+        wait = pending[0][1] + DIGEST_WINDOW - time()
+        if len(pending) < DIGEST_MAX_ENTRIES and wait > 0:
+            return wait  # Вікно ще не закрилось — збираємо далі
+
+        delivered = await db.get_deliveries(ids)
+        for chat_id in digest_users:
+            # Записи, які користувач ще не отримав (і які не видалили)
+            rows = [row for row in pending if row[3] is not None and (row[0], chat_id) not in delivered]
+            header = f"📬 **Нові записи на заняття: {len(rows)}**\n\n"
+            for text, page in pack_messages(rows, lambda row: format_entry_line(row[2:]), header):
+                fanout.send(chat_id, text, on_sent=partial(record_digest, app, [row[0] for row in page]),
+                            parse_mode="Markdown")
+        await fanout.join()
+
+    await db.complete_digest(ids)
+    return 0 if len(pending) == DIGEST_MAX_ENTRIES else None  # Є ще — перевіряємо одразу
+
+
+async def record_digest(app: AppContainer, outbox_ids: list, chat_id: int):
+    """Фіксує доставку частини дайджесту для кожної події, яку вона містила."""
+    for outbox_id in outbox_ids:
+        await app.async_db.record_delivery(outbox_id, chat_id)
+
+
+async def notify_new_entries(app: AppContainer):
     """
     Фонова задача для відстеження нових записів та надсилання сповіщень користувачам.
-    Перевіряє базу даних кожні 10 секунд на наявність нових записів.
+    Розсилає події з черги outbox, яку server.py заповнює в одній транзакції з записом.
+    Прокидається миттєво за подією від server.py (див. events.py); раз на NOTIFY_INTERVAL
+    секунд додатково перевіряє БД на випадок втраченої події.
+    Можна запускати кілька процесів бота: порції черги кожен забирає в оренду, а дайджести
+    і прибирання виконує лише власник оренди "scheduler". Перевірка не рідша за OUTBOX_LEASE
+    секунд, тож роботу процесу, що впав, інші підхоплюють протягом кількох секунд.
+    Без роботи прокидання лише читає БД: оренда береться, коли чекає дайджест або настав час
+    прибирання (раз на PURGE_INTERVAL секунд).
     """
+    scheduler_lease = Lease(app.async_db, "scheduler")  # Дайджести і прибирання — лише в одному процесі
+    new_entry_event = asyncio.Event()
+    transport = await listen_new_entries(new_entry_event)
+    new_entry_event.set()  # Одразу розсилаємо те, що накопичилось, поки бот не працював
+
     await asyncio.sleep(2)  # Затримка для завантаження
-    last_count = len(db.select_data("entries"))  # Зберігаємо початкову кількість записів
-    
-    while True:  # Нескінченний цикл перевірки
-        await asyncio.sleep(10)  # Затримка між перевірками (10 секунд)
-        
+
+    interval = min(NOTIFY_INTERVAL, OUTBOX_LEASE)
+    timeout = interval
+    next_purge = 0.0
+    try:
+        while True:  # Нескінченний цикл очікування подій
+            try:
+                await asyncio.wait_for(new_entry_event.wait(), timeout=timeout)
+            except asyncio.TimeoutError:
+                pass  # Резервна перевірка БД або закриття вікна дайджесту
+            new_entry_event.clear()
+
+            timeout = interval
+            try:
+                await drain_outbox(app)
+                purge = monotonic() >= next_purge
+                if purge:
+                    next_purge = monotonic() + PURGE_INTERVAL
+                if not purge and not await app.async_db.has_digest_pending():
+                    continue  # Роботи для планувальника немає — оренду не чіпаємо
+                async with scheduler_lease.hold() as is_scheduler:
+                    if is_scheduler:
+                        digest_wait = await flush_digests(app)
+                        if digest_wait is not None:
+                            timeout = min(timeout, digest_wait)
+                        if purge:
+                            await app.async_db.purge_outbox(OUTBOX_RETENTION)  # Прибираємо давно доставлені події
+                            await app.async_db.purge_submissions(SUBMIT_TOKEN_TTL)  # І застарілі ключі повторних відправок
+            except Exception as e:
+                print(f"Помилка в notify_new_entries: {e}")
+    finally:
+        if transport:
+            transport.close()
+
+# -----------------------------
+# Архівація та обслуговування БД
+# -----------------------------
+async def archive_old_entries(app: AppContainer) -> int:
+    """
+    Переносить записи, старші за ARCHIVE_AFTER_DAYS, в архів порціями по ARCHIVE_BATCH_SIZE.
+    Кожна порція — окрема коротка транзакція, між ними пауза, тож вставки з сервера не чекають на весь перенос.
+    :return: Скільки записів перенесено
+    """
+    if ARCHIVE_AFTER_DAYS <= 0:
+        return 0
+    total = 0
+    while True:
+        moved = await asyncio.to_thread(
+            app.maintenance_db.archive_entries, ARCHIVE_AFTER_DAYS * 86400, ARCHIVE_BATCH_SIZE
+        )
+        if isinstance(moved, str):  # Помилка БД — спробуємо під час наступного запуску
+            print(moved)
+            break
+        total += moved
+        if moved < ARCHIVE_BATCH_SIZE:
+            break
+        await asyncio.sleep(0.1)
+    if total:
+        print(f"🗄 Перенесено в архів записів: {total}")
+    return total
+
+
+async def maintain_database(app: AppContainer):
+    """
+    Фонова задача обслуговування БД, раз на MAINTENANCE_INTERVAL секунд (перший прохід — через
+    MAINTENANCE_INTERVAL після запуску, а не під час старту разом із сервером):
+    переносить старі записи в архів (робоча таблиця entries залишається малою)
+    і, якщо нових записів не було MAINTENANCE_QUIET секунд, повертає вільні сторінки ОС
+    та оновлює статистику планувальника (Database.optimize).
+    Серед кількох процесів бота виконує лише власник оренди "maintenance".
+    """
+    maintenance_lease = Lease(app.async_db, "maintenance")
+    while True:
+        await asyncio.sleep(MAINTENANCE_INTERVAL)
         try:
-            # Отримуємо поточні записи
-            current_entries = db.select_data("entries")
-            current_count = len(current_entries)
-            
-            # Якщо з'явилися нові записи
-            if current_count > last_count:
-                new_entries = current_entries[last_count:]  # Отримуємо нові записи
-                
-                # Отримуємо користувачів з увімкненими сповіщеннями
-                notify_users = db.select_data("users", ["chat_id"], "registered = 1 AND notify = 1")
-                
-                # Надсилаємо сповіщення всім підписаним користувачам
-                if notify_users and len(notify_users) > 0:
-                    for entry in new_entries:
-                        # Формуємо текст повідомлення про новий запис
-                        text = (
-                            f"🆕 **Новий запис на заняття!**\n\n"
-                            f"👤 Ім'я: {entry[1]}\n"
-                            f"📧 Email: {entry[2]}\n"
-                            f"📞 Телефон: {entry[3]}\n"
-                            f"📦 Послуга: {entry[4]}"
-                        )
-                        # Надсилаємо повідомлення кожному користувачу
-                        for user in notify_users:
-                            try:
-                                await bot.send_message(user[0], text, parse_mode="Markdown")
-                            except Exception as e:
-                                print(f"Помилка надсилання повідомлення {user[0]}: {e}")
-                
-                last_count = current_count  # Оновлюємо кількість записів
+            async with maintenance_lease.hold() as is_leader:
+                if is_leader:
+                    await archive_old_entries(app)
+                    if await asyncio.to_thread(app.maintenance_db.is_quiet, MAINTENANCE_QUIET):
+                        freed = await asyncio.to_thread(app.maintenance_db.optimize, VACUUM_PAGES)
+                        if isinstance(freed, str):
+                            print(freed)
         except Exception as e:
-            print(f"Помилка в notify_new_entries: {e}")
+            print(f"Помилка в maintain_database: {e}")
 
 # -----------------------------
-# Запуск бота
+# Обробка помилок БД
 # -----------------------------
-async def main():
+async def on_database_error(event: ErrorEvent):
     """
-    Головна функція для запуску бота.
-    Реєструє роутери, запускає фонову задачу та починає polling.
+    Відповідає користувачу, якщо обробник впав через помилку БД (DatabaseError),
+    замість того щоб залишити його без відповіді.
     """
+    print(f"Помилка БД при обробці оновлення {event.update.update_id}: {event.exception}")
+    text = "❌ Помилка бази даних, спробуйте пізніше."
+    if event.update.message:
+        await event.update.message.answer(text)
+    elif event.update.callback_query:
+        await event.update.callback_query.answer(text, show_alert=True)
+    return True
+
+# -----------------------------
+# Запуск і зупинка
+# -----------------------------
+async def on_startup(app: AppContainer, dispatcher: Dispatcher):
+    """Хук startup: готує БД і запускає фонові задачі сповіщень та обслуговування БД."""
+    await app.startup()  # Оновлення схеми БД (на випадок, якщо бот стартує раніше за сервер) і прогрів
+    dispatcher["notifier"] = asyncio.create_task(notify_new_entries(app))
+    dispatcher["maintenance"] = asyncio.create_task(maintain_database(app))
+
+
+async def on_shutdown(app: AppContainer, dispatcher: Dispatcher):
+    """Хук shutdown: зупиняє задачі в порядку, зворотному до запуску, і закриває БД останньою."""
+    for name in ("maintenance", "notifier"):
+        task = dispatcher.workflow_data.pop(name, None)
+        if task:
+            task.cancel()
+            await asyncio.gather(task, return_exceptions=True)
+    await fanout.stop()
+    await app.shutdown()
+
+
+def create_dispatcher(app: AppContainer) -> Dispatcher:
+    """
+    Створює диспетчер для контейнера app: сховище станів, проміжні обробники, роутери
+    та хуки запуску. Ресурси контейнера доступні обробникам як аргументи app, db, entries, users.
+    Роутери можна підключити лише до одного диспетчера, тож викликається один раз на процес.
+    """
+    dp = Dispatcher(storage=app.storage, **app.workflow_data())
+
+    # Тривалість обробки кожним обробником (першим, щоб враховувати і роботу інших middleware)
+    dp.message.middleware(MetricsMiddleware())
+    dp.callback_query.middleware(MetricsMiddleware())
+
+    # Обмеження частоти: флуд і перебір пароля відкидаються в пам'яті, до запитів до БД
+    throttling = ThrottlingMiddleware(app.update_limiter, {"login": app.login_limiter})
+    dp.message.middleware(throttling)
+    dp.callback_query.middleware(throttling)
+
+    # Профіль користувача для обробників (з кешу, без запиту до БД на кожне натискання)
+    dp.message.middleware(ProfileMiddleware(app.profile_cache))
+    dp.callback_query.middleware(ProfileMiddleware(app.profile_cache))
+
+    dp.errors.register(on_database_error, ExceptionTypeFilter(DatabaseError))
+
     # Реєстрація роутерів (обробників повідомлень)
     dp.include_router(start_router)      # Обробники команд (/start, /help, /status)
     dp.include_router(messages_router)   # Обробники текстових повідомлень
-    
-    # Запуск фонової задачі для сповіщень
-    asyncio.create_task(notify_new_entries())
-    
+    dp.include_router(edit_router)       # Редагування записів (картка і зміни одним повідомленням)
+
+    dp.startup.register(on_startup)
+    dp.shutdown.register(on_shutdown)
+    return dp
+
+
+async def main():
+    """
+    Головна функція для запуску бота.
+    Створює контейнер ресурсів і диспетчер; БД відкривається в хуку startup,
+    після чого оновлення надходять через polling або вебхук (BOT_MODE).
+    """
+    app = AppContainer(pool_size=1)  # Один потік запитів: бот не потребує пулу підключень сервера
+    dp = create_dispatcher(app)
+
+    print("🤖 Бот запущено!")
+    print("📊 Сповіщення працюють за подіями від сервера (з резервним опитуванням БД)")
+
+    if BOT_MODE == "webhook":
+        # Оновлення надходять на вбудований aiohttp-сервер і обробляються одразу
+        await run_webhook(dp, bot)
+        return
+
+    # Метрики для Prometheus (у режимі вебхука — на сервері вебхука)
+    metrics_runner = await start_metrics_server()
+
     # Видалення вебхука та очищення черги оновлень
     await bot.delete_webhook(drop_pending_updates=True)
     
-    print("🤖 Бот запущено!")
-    print("📊 Сповіщення працюють через БД (без кешування)")
-    
-    # Запуск polling для отримання оновлень
-    await dp.start_polling(bot)
+    # Запуск polling для отримання оновлень (хуки startup/shutdown викликає start_polling)
+    try:
+        await dp.start_polling(bot)
+    finally:
+        if metrics_runner:
+            await metrics_runner.cleanup()
 
 # -----------------------------
 # Точка входу
@@ -0,0 +1,16 @@
+# Одноразова перебудова бази, створеної без auto_vacuum: після неї фонове обслуговування
+# (bot.maintain_database) повертає ОС вільні сторінки частинами, без повного VACUUM.
+# Використання: зупиніть bot.py і server.py, потім python compact_db.py [шлях до БД]
+import sys
+from config import DATABASE
+from database import Database
+
+
+if __name__ == "__main__":
+    db = Database(sys.argv[1] if len(sys.argv) > 1 else DATABASE)
+    result = db.enable_incremental_vacuum()
+    db.close()
+    if isinstance(result, str):
+        print(result)
+        sys.exit(1)
+    print("🗜 Базу перебудовано, auto_vacuum=INCREMENTAL" if result else "Режим auto_vacuum=INCREMENTAL уже ввімкнено")
@@ -6,3 +6,57 @@ load_dotenv()
 BOT_TOKEN = os.getenv("BOT_TOKEN")
 ACCESS_CODE = os.getenv("ACCESS_CODE")
 DATABASE = os.getenv("DATABASE", "entries.db")
+NOTIFY_INTERVAL = float(os.getenv("NOTIFY_INTERVAL", "60"))  # Резервне опитування БД, якщо подію втрачено (секунди)
+NOTIFY_BATCH_SIZE = int(os.getenv("NOTIFY_BATCH_SIZE", "100"))  # Максимум записів за одну порцію
+EVENT_HOST = os.getenv("EVENT_HOST", "127.0.0.1")  # Адреса каналу подій server.py → bot.py
+EVENT_PORT = int(os.getenv("EVENT_PORT", "8765"))  # UDP-порт каналу подій
+FANOUT_CONCURRENCY = int(os.getenv("FANOUT_CONCURRENCY", "8"))  # Кількість паралельних відправок
+FANOUT_GLOBAL_RATE = float(os.getenv("FANOUT_GLOBAL_RATE", "30"))  # Ліміт Telegram: повідомлень/сек на бота
+FANOUT_CHAT_RATE = float(os.getenv("FANOUT_CHAT_RATE", "1"))  # Ліміт Telegram: повідомлень/сек в один чат
+FANOUT_MAX_ATTEMPTS = int(os.getenv("FANOUT_MAX_ATTEMPTS", "5"))  # Спроб відправки при мережевих помилках
+OUTBOX_LEASE = float(os.getenv("OUTBOX_LEASE", "15"))  # Оренда порції черги (продовжується під час обробки; після збою порцію забирає інший процес)
+OUTBOX_RETENTION = float(os.getenv("OUTBOX_RETENTION", "86400"))  # Скільки зберігати доставлені події (секунди)
+DIGEST_WINDOW = float(os.getenv("DIGEST_WINDOW", "60"))  # Вікно збору записів для дайджесту (секунди)
+DIGEST_MAX_ENTRIES = int(os.getenv("DIGEST_MAX_ENTRIES", "50"))  # Максимум записів в одному дайджесті
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "4"))  # Максимум підключень до SQLite у веб-сервері
+DB_BUSY_TIMEOUT = int(os.getenv("DB_BUSY_TIMEOUT", "5000"))  # Скільки чекати на блокування БД (мс)
+DB_CACHE_SIZE = int(os.getenv("DB_CACHE_SIZE", "8192"))  # Кеш сторінок SQLite на підключення (КіБ)
+DB_GROUP_COMMIT = os.getenv("DB_GROUP_COMMIT", "0") == "1"  # Груповий коміт вставок з /submit
+DB_SYNCHRONOUS = os.getenv("DB_SYNCHRONOUS", "NORMAL")  # PRAGMA synchronous підключень пулу: NORMAL — без fsync на кожен коміт, FULL — коміт переживає збій живлення
+DB_BATCH_SIZE = int(os.getenv("DB_BATCH_SIZE", "64"))  # Максимум рядків в одній транзакції групового коміту
+DB_BATCH_DELAY = float(os.getenv("DB_BATCH_DELAY", "0.005"))  # Скільки чекати на інші вставки (секунди)
+ENTRIES_PAGE_FETCH = int(os.getenv("ENTRIES_PAGE_FETCH", "40"))  # Скільки записів читати на сторінку перегляду
+PROFILE_CACHE_SIZE = int(os.getenv("PROFILE_CACHE_SIZE", "1024"))  # Максимум профілів користувачів у кеші
+PROFILE_CACHE_TTL = float(os.getenv("PROFILE_CACHE_TTL", "300"))  # Час життя профілю в кеші (секунди)
+FSM_CACHE_SIZE = int(os.getenv("FSM_CACHE_SIZE", "1024"))  # Максимум станів FSM у кеші (0 — без кешу)
+FSM_STATE_TTL = float(os.getenv("FSM_STATE_TTL", "86400"))  # Через скільки секунд без змін стан FSM скидається
+BOT_MODE = os.getenv("BOT_MODE", "polling")  # Отримання оновлень: "polling" або "webhook"
+WEBHOOK_URL = os.getenv("WEBHOOK_URL", "")  # Публічна адреса бота (порожня — лише локальний сервер)
+WEBHOOK_PATH = os.getenv("WEBHOOK_PATH", "/webhook")  # Шлях, на який Telegram надсилає оновлення
+WEBHOOK_HOST = os.getenv("WEBHOOK_HOST", "0.0.0.0")  # Адреса вбудованого вебхук-сервера
+WEBHOOK_PORT = int(os.getenv("WEBHOOK_PORT", "8080"))  # Порт вбудованого вебхук-сервера
+WEBHOOK_SECRET = os.getenv("WEBHOOK_SECRET", "")  # Секрет для перевірки, що запит надійшов від Telegram
+WEBHOOK_MAX_INFLIGHT = int(os.getenv("WEBHOOK_MAX_INFLIGHT", "64"))  # Максимум одночасно оброблюваних оновлень
+SEARCH_LIMIT = int(os.getenv("SEARCH_LIMIT", "20"))  # Максимум результатів пошуку
+EXPORT_BATCH_SIZE = int(os.getenv("EXPORT_BATCH_SIZE", "500"))  # Рядків за одне читання при вивантаженні
+EXPORT_SPOOL_SIZE = int(os.getenv("EXPORT_SPOOL_SIZE", str(1024 * 1024)))  # Розмір файлу в пам'яті до переходу на диск (байти)
+METRICS_HOST = os.getenv("METRICS_HOST", "127.0.0.1")  # Адреса /metrics бота в режимі polling
+METRICS_PORT = int(os.getenv("METRICS_PORT", "9101"))  # Порт /metrics бота (0 — вимкнено)
+LEADER_LEASE = float(os.getenv("LEADER_LEASE", "15"))  # Оренда ролі планувальника (дайджести, прибирання) серед кількох процесів бота
+SUBMIT_DEDUP_WINDOW = float(os.getenv("SUBMIT_DEDUP_WINDOW", "600"))  # Однакові email+телефон+послуга протягом цього часу — дублікат (секунди)
+SUBMIT_TOKEN_TTL = float(os.getenv("SUBMIT_TOKEN_TTL", "86400"))  # Скільки пам'ятати використані токени форми (секунди)
+SUBMIT_CACHE_SIZE = int(os.getenv("SUBMIT_CACHE_SIZE", "10000"))  # Ключів недавніх відправок у пам'яті сервера
+DB_STATEMENT_CACHE = int(os.getenv("DB_STATEMENT_CACHE", "256"))  # Підготовлених SQL-запитів у кеші кожного підключення
+THROTTLE_UPDATES = int(os.getenv("THROTTLE_UPDATES", "20"))  # Оновлень від одного чату за THROTTLE_WINDOW (0 — без обмеження)
+THROTTLE_WINDOW = float(os.getenv("THROTTLE_WINDOW", "10"))  # Вікно обмеження оновлень (секунди)
+LOGIN_ATTEMPTS = int(os.getenv("LOGIN_ATTEMPTS", "5"))  # Спроб введення пароля від одного чату за LOGIN_WINDOW (0 — без обмеження)
+LOGIN_WINDOW = float(os.getenv("LOGIN_WINDOW", "300"))  # Вікно обмеження спроб пароля (секунди)
+SUBMIT_RATE_LIMIT = int(os.getenv("SUBMIT_RATE_LIMIT", "10"))  # Відправок форми з однієї IP-адреси за SUBMIT_RATE_WINDOW (0 — без обмеження)
+SUBMIT_RATE_WINDOW = float(os.getenv("SUBMIT_RATE_WINDOW", "60"))  # Вікно обмеження відправок форми (секунди)
+RATE_LIMIT_KEYS = int(os.getenv("RATE_LIMIT_KEYS", "10000"))  # Ключів (чатів, IP-адрес) у пам'яті кожного обмеження
+ARCHIVE_AFTER_DAYS = float(os.getenv("ARCHIVE_AFTER_DAYS", "180"))  # Записи, старші за стільки днів, переносяться в архів (0 — не архівувати)
+ARCHIVE_BATCH_SIZE = int(os.getenv("ARCHIVE_BATCH_SIZE", "500"))  # Записів, що переносяться однією транзакцією
+MAINTENANCE_INTERVAL = float(os.getenv("MAINTENANCE_INTERVAL", "3600"))  # Як часто запускати архівацію та обслуговування БД (секунди)
+MAINTENANCE_QUIET = float(os.getenv("MAINTENANCE_QUIET", "300"))  # VACUUM/ANALYZE лише якщо стільки секунд не було нових записів
+VACUUM_PAGES = int(os.getenv("VACUUM_PAGES", "2000"))  # Скільки вільних сторінок повертати ОС за один запуск
+EDIT_PAGE_SIZE = int(os.getenv("EDIT_PAGE_SIZE", "8"))  # Записів на сторінці вибору для редагування
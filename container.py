@@ -0,0 +1,157 @@
+# Спільні ресурси процесу (БД, репозиторії, кеші) з лінивим відкриттям і впорядкованим закриттям
+import threading
+from functools import cached_property
+from config import (
+    DATABASE, DB_POOL_SIZE, DB_GROUP_COMMIT, DB_SYNCHRONOUS, THROTTLE_UPDATES, THROTTLE_WINDOW,
+    LOGIN_ATTEMPTS, LOGIN_WINDOW, SUBMIT_RATE_LIMIT, SUBMIT_RATE_WINDOW,
+)
+from database import Database, AsyncDatabase, BatchWriter
+from dedup import RecentKeys
+from middlewares import ProfileCache
+from ratelimit import RateLimiter
+from repositories import AsyncRepository, EntryRepository, UserRepository
+from states import SQLiteStorage
+
+
+class AppContainer:
+    """
+    Контейнер ресурсів, який створюється один раз у точці входу (bot.main, server.create_app)
+    і передається обробникам: у бот — через workflow_data диспетчера aiogram
+    (аргументи db, entries, users, app), у Flask — через app.extensions (див. server.get_container).
+    Кожен ресурс створюється при першому зверненні, тож імпорт модулів не відкриває файлів БД,
+    а бот не створює пул синхронних підключень сервера і навпаки.
+    Для тестів обробників передавайте шлях до тимчасового файлу, а не ":memory:": обслуговування БД,
+    експорт і груповий коміт відкривають власні підключення, а кожне підключення до ":memory:" —
+    окрема порожня база.
+    """
+
+    def __init__(self, database: str = DATABASE, pool_size: int = DB_POOL_SIZE,
+                 group_commit: bool = DB_GROUP_COMMIT, synchronous: str = DB_SYNCHRONOUS):
+        """
+        :param database: Шлях до файлу SQLite
+        :param pool_size: Кількість підключень (потоків запитів для бота)
+        :param group_commit: Чи записувати вставки з /submit груповим комітом (BatchWriter)
+        :param synchronous: PRAGMA synchronous пулу підключень веб-сервера
+        """
+        self.database = database
+        self.pool_size = pool_size
+        self.group_commit = group_commit
+        self.synchronous = synchronous
+        self._open_lock = threading.Lock()
+        self._opened = False
+
+    # -----------------------------
+    # Ресурси бота (event loop)
+    # -----------------------------
+    @cached_property
+    def async_db(self) -> AsyncDatabase:
+        """Асинхронна БД для бота (запити в окремих потоках)."""
+        return AsyncDatabase(self.database, self.pool_size)
+
+    @cached_property
+    def entries(self) -> AsyncRepository:
+        return AsyncRepository(self.async_db, EntryRepository)
+
+    @cached_property
+    def users(self) -> AsyncRepository:
+        return AsyncRepository(self.async_db, UserRepository)
+
+    @cached_property
+    def profile_cache(self) -> ProfileCache:
+        """Кеш профілів користувачів (авторизація, налаштування сповіщень)."""
+        return ProfileCache(self.users)
+
+    @cached_property
+    def storage(self) -> SQLiteStorage:
+        """Сховище станів FSM у БД (переживає перезапуск) з кешем у пам'яті."""
+        return SQLiteStorage(self.async_db)
+
+    @cached_property
+    def update_limiter(self) -> RateLimiter:
+        """Обмеження оновлень від одного чату (захист від флуду)."""
+        return RateLimiter("updates", THROTTLE_UPDATES, THROTTLE_WINDOW)
+
+    @cached_property
+    def login_limiter(self) -> RateLimiter:
+        """Обмеження спроб введення пароля від одного чату (захист від перебору)."""
+        return RateLimiter("login", LOGIN_ATTEMPTS, LOGIN_WINDOW)
+
+    @cached_property
+    def maintenance_db(self) -> Database:
+        """
+        Окреме підключення для архівації та VACUUM/ANALYZE (викликається через asyncio.to_thread),
+        щоб тривале обслуговування не займало потік запитів обробників.
+        """
+        return Database(self.database)
+
+    def workflow_data(self) -> dict:
+        """Аргументи, які aiogram передає обробникам, що їх оголошують."""
+        return {"app": self, "db": self.async_db, "entries": self.entries, "users": self.users}
+
+    async def startup(self):
+        """
+        Підготовка бота до роботи (хук startup диспетчера): оновлює схему БД і прогріває
+        підключення та підготовлені запити, щоб перше оновлення не чекало на них.
+        """
+        migration_error = await self.async_db.migrate()
+        if migration_error:
+            raise RuntimeError(migration_error)
+        await self.users.get_profile(0)
+
+    async def shutdown(self):
+        """Закриває ресурси бота у зворотному порядку (хук shutdown диспетчера)."""
+        if "storage" in self.__dict__:
+            await self.storage.close()
+        if "maintenance_db" in self.__dict__:
+            self.maintenance_db.close()
+        if "async_db" in self.__dict__:
+            await self.async_db.close()
+
+    # -----------------------------
+    # Ресурси веб-сервера (потоки Flask)
+    # -----------------------------
+    @cached_property
+    def db(self) -> Database:
+        """Синхронна БД з пулом підключень для паралельних запитів Flask."""
+        return Database(self.database, pool_size=self.pool_size, synchronous=self.synchronous)
+
+    @cached_property
+    def writer(self):
+        """Груповий коміт (BatchWriter, власне підключення з synchronous=FULL), якщо увімкнено, інакше None."""
+        return BatchWriter(self.database) if self.group_commit else None
+
+    @cached_property
+    def recent_submissions(self) -> RecentKeys:
+        """Недавні відправки форми (повтори відхиляються без запиту до БД)."""
+        return RecentKeys()
+
+    @cached_property
+    def submit_limiter(self) -> RateLimiter:
+        """Обмеження відправок форми з однієї IP-адреси."""
+        return RateLimiter("submit", SUBMIT_RATE_LIMIT, SUBMIT_RATE_WINDOW)
+
+    def open(self):
+        """
+        Підготовка веб-сервера: оновлює схему БД при першому запиті (а не під час імпорту).
+        Безпечно викликати з кількох потоків — міграції виконуються один раз.
+        """
+        if self._opened:
+            return
+        with self._open_lock:
+            if self._opened:
+                return
+            migration_error = self.db.migrate()
+            if migration_error:
+                raise RuntimeError(migration_error)
+            # Створюємо ресурси під блокуванням: cached_property не захищає від одночасного створення в потоках
+            self.writer
+            self.recent_submissions
+            self.submit_limiter
+            self._opened = True
+
+    def close(self):
+        """Закриває ресурси веб-сервера: спершу дописує групові коміти, потім закриває підключення."""
+        if self.__dict__.get("writer"):
+            self.writer.close()
+        if "db" in self.__dict__:
+            self.db.close()
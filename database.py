@@ -1,46 +1,327 @@
-from sqlite3 import connect, Connection, Cursor
+import asyncio
+import re
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache, partial, wraps
+from inspect import signature
+from queue import LifoQueue, Queue, Empty
+from sqlite3 import connect, Connection, Cursor, Error as SQLiteError
+from time import time, monotonic, perf_counter
+from config import (
+    DB_BUSY_TIMEOUT, DB_CACHE_SIZE, DB_BATCH_SIZE, DB_BATCH_DELAY, DB_STATEMENT_CACHE, DB_SYNCHRONOUS,
+)
+from migrations import MIGRATIONS
+from metrics import DB_QUERY_SECONDS
+
+SYNCHRONOUS_MODES = ("OFF", "NORMAL", "FULL", "EXTRA")  # Допустимі значення PRAGMA synchronous
+INCREMENTAL_VACUUM = 2  # Значення PRAGMA auto_vacuum для режиму INCREMENTAL
+ANALYZE_LIMIT = 1000  # Рядків кожного індексу, які переглядає ANALYZE (наближена статистика без читання всієї таблиці)
+
+class DatabaseError(Exception):
+    """Помилка запиту до БД (методи fetch_*/execute та репозиторії в repositories.py)."""
+
+
+DUPLICATE_ENTRY = "Повторна відправка"  # Результат вставки, відхиленої за ключем ідемпотентності
+
+
+class DuplicateEntry(Exception):
+    """Ключ ідемпотентності вже використано (всередині транзакції вставки)."""
+
+
+@lru_cache(maxsize=512)
+def _sql_table(sql: str) -> str:
+    """Назва першої таблиці в тексті запиту (для мітки метрики; тексти запитів незмінні, тож кешується)."""
+    match = re.search(r"\b(?:FROM|INTO|UPDATE)\s+(\w+)", sql, re.IGNORECASE)
+    return match.group(1) if match else ""
+
+
+def pooled(method):
+    """
+    Декоратор методів Database: на час виклику закріплює за поточним потоком
+    підключення з пулу (self.connection / self.cursor) і повертає його після завершення.
+    Вкладені виклики (метод викликає інший метод) використовують те саме підключення.
+    Тривалість зовнішнього виклику записується в метрику db_query_seconds
+    з мітками operation (назва методу) і table (аргумент table або таблиця з тексту sql).
+    """
+    operation = method.__name__
+    parameters = list(signature(method).parameters)
+    if "table" in parameters:
+        table_index, table_of = parameters.index("table") - 1, str  # Без self
+    elif "sql" in parameters:
+        table_index, table_of = parameters.index("sql") - 1, _sql_table
+    else:
+        table_index, table_of = None, None
+
+    @wraps(method)
+    def wrapper(self, *args, **kwargs):
+        if getattr(self._local, "connection", None) is not None:
+            return method(self, *args, **kwargs)
+        started = perf_counter()
+        connection = self._acquire()
+        self._local.connection = connection
+        self._local.cursor = connection.cursor()
+        try:
+            return method(self, *args, **kwargs)
+        finally:
+            if connection.in_transaction:  # Незавершена транзакція не повинна потрапити в пул
+                connection.rollback()
+            self._local.connection = None
+            self._local.cursor = None
+            self._release(connection)
+            if table_index is None:
+                table = ""
+            elif table_index < len(args):
+                table = table_of(args[table_index])
+            else:
+                table = table_of(kwargs.get(parameters[table_index + 1], ""))
+            DB_QUERY_SECONDS.observe(perf_counter() - started, operation, table)
+    return wrapper
+
 
 class Database:
-    def __init__(self, db_name: str):
+    def __init__(self, db_name: str, pool_size: int = 1, synchronous: str = DB_SYNCHRONOUS):
         """Ініціалізація підключення до бази даних.
-        Підключається до файлу SQLite і створює курсор для виконання запитів.
+        Підключення відкриваються за потребою і зберігаються в пулі (не більше pool_size).
+        Кожен виклик методу бере окреме підключення, тож потоки Flask не ділять між собою курсор.
+        :param db_name: Шлях до файлу SQLite
+        :param pool_size: Максимальна кількість одночасних підключень
+        :param synchronous: PRAGMA synchronous підключень (NORMAL або FULL)
         """
-        self.connection: Connection = connect(db_name, check_same_thread=False)
-        self.cursor: Cursor = self.connection.cursor()
+        if synchronous.upper() not in SYNCHRONOUS_MODES:
+            raise ValueError(f"Невідомий режим synchronous: {synchronous}")
+        self.db_name = db_name
+        self.pool_size = pool_size
+        self.synchronous = synchronous.upper()
+        self._pool: LifoQueue = LifoQueue()
+        self._connections: list[Connection] = []
+        self._lock = threading.Lock()
+        self._local = threading.local()
 
-    def create_table(self, table_name: str, columns: list, types: list):
+    def _connect(self) -> Connection:
         """
-        Створює таблицю у базі даних, якщо вона ще не існує.
-        :param table_name: Назва таблиці
-        :param columns: Список колонок
-        :param types: Список типів і обмежень для колонок
+        Відкриває нове підключення з налаштуваннями для конкурентної роботи:
+        WAL (читачі не блокують запис і навпаки), очікування блокування замість
+        миттєвої помилки "database is locked", synchronous (за замовчуванням NORMAL — у WAL коміт
+        не чекає на fsync, тож останні коміти можуть загубитись при збої живлення) і збільшений кеш сторінок.
+        Кеш підготовлених запитів (cached_statements) збільшено, щоб незмінні тексти SQL
+        з repositories.py компілювались один раз на підключення.
         """
-        if len(columns) != len(types):
-            return "Кількість колонок і типів не співпадає."
-        columns_def = ", ".join([f"{col} {typ}" for col, typ in zip(columns, types)])
-        query = f"CREATE TABLE IF NOT EXISTS {table_name} ({columns_def})"
+        connection = connect(self.db_name, check_same_thread=False, cached_statements=DB_STATEMENT_CACHE)
+        connection.execute(f"PRAGMA busy_timeout = {DB_BUSY_TIMEOUT}")
+        connection.execute("PRAGMA journal_mode = WAL")
+        connection.execute(f"PRAGMA synchronous = {self.synchronous}")
+        connection.execute(f"PRAGMA cache_size = -{DB_CACHE_SIZE}")
+        connection.execute("PRAGMA temp_store = MEMORY")
+        return connection
+
+    def _acquire(self) -> Connection:
+        """Бере вільне підключення з пулу або відкриває нове, якщо ліміт ще не досягнуто."""
         try:
-            self.cursor.execute(query)
-            self.connection.commit()
+            return self._pool.get_nowait()
+        except Empty:
+            pass
+        with self._lock:
+            if len(self._connections) < self.pool_size:
+                connection = self._connect()
+                self._connections.append(connection)
+                return connection
+        return self._pool.get()  # Усі підключення зайняті — чекаємо, доки звільниться
+
+    def _release(self, connection: Connection):
+        """Повертає підключення в пул."""
+        self._pool.put(connection)
+
+    @property
+    def connection(self) -> Connection:
+        """Підключення, закріплене за поточним викликом методу."""
+        return self._local.connection
+
+    @property
+    def cursor(self) -> Cursor:
+        """Курсор підключення, закріпленого за поточним викликом методу."""
+        return self._local.cursor
+
+    @pooled
+    def migrate(self):
+        """
+        Приводить схему бази даних до актуальної версії.
+        Застосовує по черзі міграції з migrations.MIGRATIONS, новіші за PRAGMA user_version,
+        кожну в окремій транзакції. Безпечно викликати з кількох процесів одночасно.
+        Нова (порожня) база одразу створюється в режимі auto_vacuum=INCREMENTAL.
+        """
+        if self.cursor.execute("PRAGMA user_version").fetchone()[0] >= len(MIGRATIONS):
+            return  # Схема актуальна
+        try:
+            if not self.cursor.execute("SELECT 1 FROM sqlite_master LIMIT 1").fetchone():
+                self._set_incremental_vacuum()  # Порожній файл: VACUUM миттєвий
+            for version, migration in enumerate(MIGRATIONS, start=1):
+                self.cursor.execute("BEGIN IMMEDIATE")  # Інший процес не застосує ту саму міграцію
+                if self.cursor.execute("PRAGMA user_version").fetchone()[0] >= version:
+                    self.connection.rollback()
+                    continue
+                migration(self.cursor)
+                self.cursor.execute(f"PRAGMA user_version = {version}")
+                self.connection.commit()
+                print(f"🗄 Міграція {version}: {migration.__doc__}")
         except Exception as e:
-            return f"Помилка при створенні таблиці: {e}"
+            self.connection.rollback()
+            return f"Помилка при міграції бази даних: {e}"
+
+    def _claim_keys(self, dedup: tuple):
+        """
+        Фіксує ключі ідемпотентності в таблиці submissions (без коміту).
+        Ключ, що вже є і ще не застарів, означає повторну відправку — тоді DuplicateEntry.
+        :param dedup: Пари (ключ, вікно в секундах)
+        """
+        now = time()
+        for key, window in dedup:
+            self.cursor.execute(
+                "INSERT INTO submissions (key, created_at) VALUES (?, ?) "
+                "ON CONFLICT (key) DO UPDATE SET created_at = excluded.created_at "
+                "WHERE submissions.created_at < ?",
+                (key, now, now - window)
+            )
+            if self.cursor.rowcount == 0:
+                raise DuplicateEntry(key)
 
-    def insert_data(self, table: str, columns: list, values: tuple):
+    def _insert(self, table: str, columns: list, values: tuple, outbox: bool, dedup: tuple = ()):
+        """Виконує INSERT (і, за потреби, запис в outbox) без коміту."""
+        if dedup:
+            self._claim_keys(dedup)
+        placeholders = ", ".join(["?" for _ in values])
+        columns_str = ", ".join(columns)
+        query = f"INSERT INTO {table} ({columns_str}) VALUES ({placeholders})"
+        self.cursor.execute(query, values)
+        if outbox:
+            self.cursor.execute(
+                "INSERT INTO outbox (entry_id, created_at) VALUES (?, ?)",
+                (self.cursor.lastrowid, time())
+            )
+
+    @pooled
+    def insert_data(self, table: str, columns: list, values: tuple, outbox: bool = False, dedup: tuple = ()):
         """
         Вставляє рядок у таблицю.
         :param table: Назва таблиці
         :param columns: Список колонок
         :param values: Значення для вставки у вигляді кортежу
+        :param outbox: Якщо True — в тій самій транзакції додає подію в таблицю outbox
+                       (див. migrations.py), щоб бот гарантовано розіслав сповіщення
+        :param dedup: Ключі ідемпотентності — пари (ключ, вікно в секундах); якщо будь-який
+                      з них уже використано протягом свого вікна, нічого не записується
+        :return: None, DUPLICATE_ENTRY для повторної відправки або текст помилки
         """
-        placeholders = ", ".join(["?" for _ in values])
-        columns_str = ", ".join(columns)
-        query = f"INSERT INTO {table} ({columns_str}) VALUES ({placeholders})"
         try:
-            self.cursor.execute(query, values)
+            self._insert(table, columns, values, outbox, dedup)
             self.connection.commit()
+        except DuplicateEntry:
+            self.connection.rollback()
+            return DUPLICATE_ENTRY
         except Exception as e:
+            self.connection.rollback()
             return f"Помилка при вставці даних: {e}"
 
+    @pooled
+    def insert_many(self, rows: list):
+        """
+        Вставляє кілька рядків в одній транзакції (один коміт на всю порцію).
+        Кожен рядок виконується у власній точці збереження, тож помилка в одному
+        не скасовує інші.
+        :param rows: Список кортежів (table, columns, values, outbox[, dedup]) — як аргументи insert_data
+        :return: Список результатів для кожного рядка (None, DUPLICATE_ENTRY або текст помилки)
+        """
+        results = []
+        try:
+            self.cursor.execute("BEGIN")
+            for row in rows:
+                self.cursor.execute("SAVEPOINT insert_row")
+                try:
+                    self._insert(*row)
+                    results.append(None)
+                except DuplicateEntry:
+                    self.cursor.execute("ROLLBACK TO insert_row")
+                    results.append(DUPLICATE_ENTRY)
+                except Exception as e:
+                    self.cursor.execute("ROLLBACK TO insert_row")
+                    results.append(f"Помилка при вставці даних: {e}")
+                self.cursor.execute("RELEASE insert_row")
+            self.connection.commit()
+        except Exception as e:
+            self.connection.rollback()
+            return [f"Помилка при вставці даних: {e}"] * len(rows)
+        return results
+
+    # -----------------------------
+    # Типізовані запити (див. repositories.py)
+    # -----------------------------
+    def _query(self, sql: str, params: tuple, factory) -> Cursor:
+        """Виконує запит в окремому курсорі з row_factory (None — звичайні кортежі)."""
+        cursor = self.connection.cursor()
+        cursor.row_factory = factory
+        cursor.execute(sql, params)
+        return cursor
+
+    @pooled
+    def fetch_all(self, sql: str, params: tuple = (), factory=None) -> list:
+        """
+        Повертає всі рядки запиту.
+        :param sql: Незмінний текст запиту з параметрами "?"
+        :param params: Значення параметрів
+        :param factory: row_factory(cursor, row), що перетворює рядок на об'єкт
+        :raises DatabaseError: якщо запит не вдався
+        """
+        try:
+            return self._query(sql, params, factory).fetchall()
+        except SQLiteError as e:
+            raise DatabaseError(f"Помилка при виборі даних: {e}") from e
+
+    @pooled
+    def fetch_one(self, sql: str, params: tuple = (), factory=None):
+        """Повертає перший рядок запиту або None. :raises DatabaseError: якщо запит не вдався"""
+        try:
+            return self._query(sql, params, factory).fetchone()
+        except SQLiteError as e:
+            raise DatabaseError(f"Помилка при виборі даних: {e}") from e
+
+    @pooled
+    def execute(self, sql: str, params: tuple = ()) -> int:
+        """
+        Виконує запит на зміну даних і комітить його.
+        :return: Кількість змінених рядків
+        :raises DatabaseError: якщо запит не вдався (зміни скасовуються)
+        """
+        try:
+            cursor = self._query(sql, params, None)
+            self.connection.commit()
+            return cursor.rowcount
+        except SQLiteError as e:
+            self.connection.rollback()
+            raise DatabaseError(f"Помилка при зміні даних: {e}") from e
+
+    def iterate(self, sql: str, params: tuple = (), factory=None, batch_size: int = 500):
+        """
+        Генератор рядків запиту: читає порціями (fetchmany), не тримаючи весь результат у пам'яті.
+        Займає окреме підключення з пулу, доки генератор не буде вичерпано або закрито.
+        :raises DatabaseError: якщо запит не вдався
+        """
+        connection = self._acquire()
+        try:
+            cursor = connection.cursor()
+            cursor.row_factory = factory
+            cursor.execute(sql, params)
+            while rows := cursor.fetchmany(batch_size):
+                yield from rows
+        except SQLiteError as e:
+            raise DatabaseError(f"Помилка при виборі даних: {e}") from e
+        finally:
+            if connection.in_transaction:
+                connection.rollback()
+            self._release(connection)
+
+    # -----------------------------
+    # Універсальні запити
+    # -----------------------------
+    @pooled
     def select_data(self, table: str, columns: list = ["*"], where: str = "", params: tuple = ()):
         """
         Отримує дані з таблиці.
@@ -60,6 +341,7 @@ class Database:
         except Exception as e:
             return f"Помилка при виборі даних: {e}"
 
+    @pooled
     def update_data(self, table: str, updates: dict, where: str = "", params: tuple = ()):
         """
         Оновлює дані у таблиці.
@@ -79,6 +361,7 @@ class Database:
         except Exception as e:
             return f"Помилка при оновленні даних: {e}"
 
+    @pooled
     def delete_data(self, table: str, where: str = "", params: tuple = ()):
         """
         Видаляє рядки з таблиці.
@@ -95,6 +378,522 @@ class Database:
         except Exception as e:
             return f"Помилка при видаленні даних: {e}"
 
+    # -----------------------------
+    # Статистика записів
+    # -----------------------------
+    @pooled
+    def get_stats(self) -> dict:
+        """
+        Повертає статистику записів без підрахунку самої таблиці entries.
+        :return: {"total": int, "today": int, "types": [(послуга, кількість), ...] за спаданням}
+        """
+        stats = {"total": 0, "today": 0, "types": []}
+        try:
+            self.cursor.execute(
+                "SELECT scope, key, count FROM entry_stats "
+                "WHERE scope IN ('total', 'type') OR (scope = 'day' AND key = date('now', 'localtime'))"
+            )
+            for scope, key, count in self.cursor.fetchall():
+                if scope == "total":
+                    stats["total"] = count
+                elif scope == "day":
+                    stats["today"] = count
+                elif count > 0:
+                    stats["types"].append((key, count))
+        except Exception as e:
+            print(f"Помилка при читанні статистики: {e}")
+        stats["types"].sort(key=lambda item: item[1], reverse=True)
+        return stats
+
+    # -----------------------------
+    # Стани FSM
+    # -----------------------------
+    @pooled
+    def load_fsm(self, key: str):
+        """
+        Повертає збережений стан FSM.
+        :param key: Ключ сховища
+        :return: (state, data у JSON, updated_at) або None
+        """
+        result = self.select_data("fsm_state", ["state", "data", "updated_at"], "key = ?", (key,))
+        return result[0] if isinstance(result, list) and result else None
+
+    @pooled
+    def save_fsm(self, key: str, state, data):
+        """
+        Зберігає стан FSM; якщо і стан, і дані порожні — видаляє запис.
+        :param key: Ключ сховища
+        :param state: Назва стану або None
+        :param data: Дані у JSON або None
+        """
+        try:
+            if state is None and data is None:
+                self.cursor.execute("DELETE FROM fsm_state WHERE key = ?", (key,))
+            else:
+                self.cursor.execute(
+                    "INSERT INTO fsm_state (key, state, data, updated_at) VALUES (?, ?, ?, ?) "
+                    "ON CONFLICT(key) DO UPDATE SET state = excluded.state, data = excluded.data, "
+                    "updated_at = excluded.updated_at",
+                    (key, state, data, time())
+                )
+            self.connection.commit()
+        except Exception as e:
+            return f"Помилка при збереженні стану: {e}"
+
+    @pooled
+    def purge_fsm(self, older_than: float):
+        """Видаляє стани FSM, що не змінювались довше за older_than секунд."""
+        return self.delete_data("fsm_state", "updated_at < ?", (time() - older_than,))
+
+    # -----------------------------
+    # Черга сповіщень (outbox)
+    # -----------------------------
+    @pooled
+    def claim_outbox(self, limit: int, lease: float, owner: str):
+        """
+        Забирає порцію недоставлених подій в обробку на lease секунд.
+        Якщо обробник впаде, не позначивши подію доставленою, її знову заберуть після закінчення оренди.
+        Спершу черга перевіряється читанням (частковий індекс idx_outbox_pending), тож порожня черга
+        не відкриває транзакцію запису і не конкурує за блокування з вставками сервера.
+        :param limit: Максимальна кількість подій
+        :param lease: Тривалість оренди в секундах
+        :param owner: Ідентифікатор процесу, що забирає порцію
+        :return: Список (outbox_id, entry_id, name, email, phone, type, created_at);
+                 поля запису None, якщо його видалено
+        """
+        now = time()
+        pending = (
+            "SELECT id FROM outbox WHERE delivered_at IS NULL "
+            "AND (claimed_until IS NULL OR claimed_until < ?) ORDER BY id LIMIT ?"
+        )
+        try:
+            if not self.cursor.execute(pending, (now, 1)).fetchall():
+                return []  # Немає роботи — без блокування запису
+            self.cursor.execute("BEGIN IMMEDIATE")  # Блокуємо запис, щоб подію не забрали двічі
+            self.cursor.execute(pending, (now, limit))
+            ids = [row[0] for row in self.cursor.fetchall()]
+            if ids:
+                placeholders = ", ".join(["?" for _ in ids])
+                self.cursor.execute(
+                    f"UPDATE outbox SET claimed_until = ?, claimed_by = ? WHERE id IN ({placeholders})",
+                    (now + lease, owner, *ids)
+                )
+            self.connection.commit()
+            if not ids:
+                return []
+            self.cursor.execute(
+                "SELECT o.id, o.entry_id, e.name, e.email, e.phone, e.type, o.created_at "
+                "FROM outbox o LEFT JOIN entries e ON e.id = o.entry_id "
+                f"WHERE o.id IN ({placeholders}) ORDER BY o.id",
+                ids
+            )
+            return self.cursor.fetchall()
+        except Exception as e:
+            self.connection.rollback()
+            return f"Помилка при виборі черги сповіщень: {e}"
+
+    @pooled
+    def get_deliveries(self, outbox_ids: list) -> set:
+        """Повертає множину пар (outbox_id, chat_id) для вказаних подій."""
+        if not outbox_ids:
+            return set()
+        placeholders = ", ".join(["?" for _ in outbox_ids])
+        result = self.select_data(
+            "outbox_deliveries", ["outbox_id", "chat_id"], f"outbox_id IN ({placeholders})", tuple(outbox_ids)
+        )
+        return set(result) if isinstance(result, list) else set()
+
+    @pooled
+    def record_delivery(self, outbox_id: int, chat_id: int):
+        """Фіксує доставку події користувачу (повторний виклик нічого не змінює)."""
+        try:
+            self.cursor.execute(
+                "INSERT OR IGNORE INTO outbox_deliveries (outbox_id, chat_id) VALUES (?, ?)",
+                (outbox_id, chat_id)
+            )
+            self.connection.commit()
+        except Exception as e:
+            return f"Помилка при збереженні доставки: {e}"
+
+    @pooled
+    def extend_outbox(self, ids: list, lease: float, owner: str):
+        """
+        Продовжує оренду порції, яку ще обробляє owner.
+        :return: Кількість подій, оренду яких вдалося продовжити, або текст помилки
+        """
+        placeholders = ", ".join(["?" for _ in ids])
+        try:
+            self.cursor.execute(
+                f"UPDATE outbox SET claimed_until = ? WHERE id IN ({placeholders}) "
+                "AND claimed_by = ? AND delivered_at IS NULL",
+                (time() + lease, *ids, owner)
+            )
+            self.connection.commit()
+            return self.cursor.rowcount
+        except Exception as e:
+            self.connection.rollback()
+            return f"Помилка при продовженні оренди: {e}"
+
+    @pooled
+    def complete_outbox(self, ids: list):
+        """Позначає події доставленими."""
+        if not ids:
+            return
+        placeholders = ", ".join(["?" for _ in ids])
+        return self.update_data("outbox", {"delivered_at": time()}, f"id IN ({placeholders})", tuple(ids))
+
+    @pooled
+    def acquire_lease(self, name: str, owner: str, ttl: float):
+        """
+        Бере іменовану оренду на ttl секунд або продовжує власну.
+        Чужу оренду можна забрати лише після закінчення її терміну.
+        :param name: Назва оренди (наприклад, "scheduler")
+        :param owner: Ідентифікатор процесу
+        :param ttl: Термін дії в секундах
+        :return: True, якщо оренда належить owner; False, якщо зайнята; текст помилки
+        """
+        now = time()
+        try:
+            self.cursor.execute(
+                "INSERT INTO leases (name, owner, expires_at) VALUES (?, ?, ?) "
+                "ON CONFLICT (name) DO UPDATE SET owner = excluded.owner, expires_at = excluded.expires_at "
+                "WHERE leases.owner = excluded.owner OR leases.expires_at < ?",
+                (name, owner, now + ttl, now)
+            )
+            acquired = self.cursor.rowcount > 0
+            self.connection.commit()
+            return acquired
+        except Exception as e:
+            self.connection.rollback()
+            return f"Помилка при отриманні оренди: {e}"
+
+    @pooled
+    def release_lease(self, name: str, owner: str):
+        """Звільняє оренду, якщо вона належить owner."""
+        return self.delete_data("leases", "name = ? AND owner = ?", (name, owner))
+
+    @pooled
+    def select_digest(self, limit: int):
+        """
+        Повертає найстаріші події, ще не включені в дайджест.
+        :param limit: Максимальна кількість подій
+        :return: Список (outbox_id, created_at, entry_id, name, email, phone, type)
+        """
+        try:
+            self.cursor.execute(
+                "SELECT o.id, o.created_at, o.entry_id, e.name, e.email, e.phone, e.type "
+                "FROM outbox o LEFT JOIN entries e ON e.id = o.entry_id "
+                "WHERE o.digested_at IS NULL ORDER BY o.id LIMIT ?",
+                (limit,)
+            )
+            return self.cursor.fetchall()
+        except Exception as e:
+            return f"Помилка при виборі дайджесту: {e}"
+
+    @pooled
+    def has_digest_pending(self) -> bool:
+        """Чи є події, ще не включені в дайджест (лише читання за індексом idx_outbox_digest)."""
+        try:
+            self.cursor.execute("SELECT 1 FROM outbox WHERE digested_at IS NULL LIMIT 1")
+            return self.cursor.fetchone() is not None
+        except Exception as e:
+            print(f"Помилка при перевірці дайджесту: {e}")
+            return False
+
+    @pooled
+    def complete_digest(self, ids: list):
+        """Позначає події включеними в дайджест."""
+        if not ids:
+            return
+        placeholders = ", ".join(["?" for _ in ids])
+        return self.update_data("outbox", {"digested_at": time()}, f"id IN ({placeholders})", tuple(ids))
+
+    @pooled
+    def purge_submissions(self, older_than: float):
+        """Видаляє ключі ідемпотентності, старші за older_than секунд."""
+        return self.delete_data("submissions", "created_at < ?", (time() - older_than,))
+
+    @pooled
+    def purge_outbox(self, older_than: float):
+        """
+        Видаляє доставлені (і включені в дайджест) події, старші за older_than секунд,
+        разом з їхніми доставками.
+        :param older_than: Вік у секундах
+        """
+        threshold = time() - older_than
+        try:
+            self.cursor.execute(
+                "DELETE FROM outbox_deliveries WHERE outbox_id IN "
+                "(SELECT id FROM outbox WHERE delivered_at < ? AND digested_at < ?)",
+                (threshold, threshold)
+            )
+            self.cursor.execute(
+                "DELETE FROM outbox WHERE delivered_at < ? AND digested_at < ?", (threshold, threshold)
+            )
+            self.connection.commit()
+        except Exception as e:
+            self.connection.rollback()
+            return f"Помилка при очищенні черги сповіщень: {e}"
+
+    # -----------------------------
+    # Архів і обслуговування
+    # -----------------------------
+    @pooled
+    def archive_entries(self, older_than: float, limit: int):
+        """
+        Переносить до limit найстаріших записів, створених раніше ніж older_than секунд тому,
+        з entries в entries_archive однією короткою транзакцією. Записи без created_at
+        (створені до його появи) не переносяться — їхній вік невідомий; так само й записи,
+        події яких ще в черзі сповіщень.
+        :return: Кількість перенесених записів або текст помилки
+        """
+        try:
+            self.cursor.execute("BEGIN IMMEDIATE")
+            self.cursor.execute(
+                "SELECT id FROM entries WHERE created_at < ? "
+                "AND id NOT IN (SELECT entry_id FROM outbox WHERE delivered_at IS NULL OR digested_at IS NULL) "
+                "ORDER BY created_at LIMIT ?",  # Порядок індексу idx_entries_created_at: читається лише ~limit рядків
+                (time() - older_than, limit)
+            )
+            ids = [row[0] for row in self.cursor.fetchall()]
+            if ids:
+                placeholders = ", ".join(["?" for _ in ids])
+                self.cursor.execute(
+                    "INSERT INTO entries_archive (id, name, email, phone, type, created_at, archived_at) "
+                    f"SELECT id, name, email, phone, type, created_at, ? FROM entries WHERE id IN ({placeholders})",
+                    (time(), *ids)
+                )
+                self.cursor.execute(f"DELETE FROM entries WHERE id IN ({placeholders})", ids)
+            self.connection.commit()
+            return len(ids)
+        except Exception as e:
+            self.connection.rollback()
+            return f"Помилка при архівації записів: {e}"
+
+    @pooled
+    def is_quiet(self, period: float) -> bool:
+        """Чи не було нових записів period секунд і чи порожня черга сповіщень (час для обслуговування)."""
+        try:
+            latest = self.cursor.execute("SELECT MAX(created_at) FROM entries").fetchone()[0]
+            if latest is not None and latest > time() - period:
+                return False
+            self.cursor.execute("SELECT 1 FROM outbox WHERE delivered_at IS NULL LIMIT 1")
+            return self.cursor.fetchone() is None
+        except Exception as e:
+            print(f"Помилка при перевірці активності: {e}")
+            return False
+
+    @pooled
+    def optimize(self, vacuum_pages: int):
+        """
+        Обслуговування файлу БД: повертає ОС до vacuum_pages вільних сторінок (incremental VACUUM)
+        і оновлює статистику планувальника запитів (ANALYZE з обмеженням ANALYZE_LIMIT).
+        Кожен крок короткий, тож його можна виконувати поруч із записом форм. Для бази без
+        auto_vacuum=INCREMENTAL сторінки не повертаються (див. enable_incremental_vacuum).
+        :return: Кількість звільнених сторінок або текст помилки
+        """
+        try:
+            free_before = self.cursor.execute("PRAGMA freelist_count").fetchone()[0]
+            if self.cursor.execute("PRAGMA auto_vacuum").fetchone()[0] == INCREMENTAL_VACUUM:
+                self.cursor.execute(f"PRAGMA incremental_vacuum({int(vacuum_pages)})").fetchall()
+            free_after = self.cursor.execute("PRAGMA freelist_count").fetchone()[0]
+            self.cursor.execute(f"PRAGMA analysis_limit = {ANALYZE_LIMIT}")
+            self.cursor.execute("ANALYZE")
+            return free_before - free_after
+        except Exception as e:
+            return f"Помилка при обслуговуванні бази даних: {e}"
+
+    def _set_incremental_vacuum(self):
+        """Вмикає auto_vacuum=INCREMENTAL (режим змінюється лише повним VACUUM)."""
+        self.cursor.execute("PRAGMA auto_vacuum = INCREMENTAL")
+        self.cursor.execute("VACUUM")
+
+    @pooled
+    def enable_incremental_vacuum(self):
+        """
+        Одноразово переводить базу, створену без auto_vacuum, у режим INCREMENTAL.
+        Повний VACUUM переписує весь файл і весь цей час тримає блокування запису,
+        тож запускати його слід лише при зупинених боті й сервері (python compact_db.py).
+        :return: True, якщо режим змінено, False, якщо його вже ввімкнено, або текст помилки
+        """
+        try:
+            if self.cursor.execute("PRAGMA auto_vacuum").fetchone()[0] == INCREMENTAL_VACUUM:
+                return False
+            self._set_incremental_vacuum()
+            return True
+        except Exception as e:
+            return f"Помилка при перебудові бази даних: {e}"
+
+    def close(self):
+        """Закриває всі підключення до бази даних."""
+        with self._lock:
+            for connection in self._connections:
+                connection.close()
+            self._connections.clear()
+
+
+class _Write:
+    """Запит на вставку, що чекає на коміт своєї порції."""
+    __slots__ = ("args", "queued_at", "done", "result")
+
+    def __init__(self, args: tuple):
+        self.args = args
+        self.queued_at = monotonic()
+        self.done = threading.Event()
+        self.result = None
+
+
+class BatchWriter:
+    """
+    Груповий коміт для вставок з багатьох потоків (запити Flask).
+    Вставки збираються в порцію до max_batch рядків або max_delay секунд і записуються
+    однією транзакцією, тож на десятки записів припадає один коміт замість десятків.
+    Порції комітяться через власне підключення з synchronous=FULL: insert_data повертає
+    результат лише після того, як порцію записано на диск (fsync), і цей fsync ділять
+    усі рядки порції (див. python -m benchmarks commit).
+    """
+
+    def __init__(self, db_name: str, max_batch: int = DB_BATCH_SIZE, max_delay: float = DB_BATCH_DELAY):
+        """
+        :param db_name: Шлях до файлу SQLite
+        :param max_batch: Максимум рядків в одній транзакції
+        :param max_delay: Скільки чекати на інші вставки (секунди)
+        """
+        self.db = Database(db_name, synchronous="FULL")
+        self.max_batch = max_batch
+        self.max_delay = max_delay
+        self._queue: Queue = Queue()
+        # Лічильники для налаштування розміру порції та затримки
+        self.batches = 0
+        self.rows = 0
+        self.largest_batch = 0
+        self.wait_total = 0.0  # Сумарний час очікування рядків у черзі (с)
+        self.commit_total = 0.0  # Сумарний час запису порцій (с)
+        self.commit_max = 0.0
+        self._thread = threading.Thread(target=self._run, name="db-writer", daemon=True)
+        self._thread.start()
+
+    def insert_data(self, table: str, columns: list, values: tuple, outbox: bool = False, dedup: tuple = ()):
+        """
+        Ставить вставку в чергу і чекає на коміт її порції.
+        Аргументи та результат — як у Database.insert_data.
+        """
+        request = _Write((table, columns, values, outbox, dedup))
+        self._queue.put(request)
+        request.done.wait()
+        return request.result
+
+    def stats(self) -> dict:
+        """Повертає лічильники групового коміту."""
+        return {
+            "batches": self.batches,
+            "rows": self.rows,
+            "avg_batch": round(self.rows / self.batches, 2) if self.batches else 0,
+            "largest_batch": self.largest_batch,
+            "avg_wait_ms": round(self.wait_total / self.rows * 1000, 3) if self.rows else 0,
+            "avg_commit_ms": round(self.commit_total / self.batches * 1000, 3) if self.batches else 0,
+            "max_commit_ms": round(self.commit_max * 1000, 3),
+        }
+
     def close(self):
-        """Закриває підключення до бази даних."""
-        self.connection.close()
+        """Дописує чергу, зупиняє потік запису і закриває його підключення."""
+        self._queue.put(None)
+        self._thread.join()
+        self.db.close()
+
+    def _collect(self, first: _Write) -> tuple:
+        """Збирає порцію: до max_batch рядків або поки не мине max_delay."""
+        batch = [first]
+        deadline = monotonic() + self.max_delay
+        while len(batch) < self.max_batch:
+            remaining = deadline - monotonic()
+            if remaining <= 0:
+                break
+            try:
+                request = self._queue.get(timeout=remaining)
+            except Empty:
+                break
+            if request is None:
+                return batch, True
+            batch.append(request)
+        return batch, False
+
+    def _run(self):
+        """Потік запису: збирає порції та комітить кожну однією транзакцією."""
+        stop = False
+        while not stop:
+            first = self._queue.get()
+            if first is None:
+                break
+            batch, stop = self._collect(first)
+
+            started = monotonic()
+            results = ["Помилка при вставці даних: порцію не записано"] * len(batch)
+            try:
+                results = self.db.insert_many([request.args for request in batch])
+            except Exception as e:  # Наприклад, "database is locked" під час відкриття підключення
+                print(f"Помилка групового коміту: {e}")
+                results = [f"Помилка при вставці даних: {e}"] * len(batch)
+            finally:
+                # Кожен запит порції отримує відповідь, тож /submit не зависає, а потік працює далі
+                for request, result in zip(batch, results):
+                    request.result = result
+                    request.done.set()
+            elapsed = monotonic() - started
+
+            self.batches += 1
+            self.rows += len(batch)
+            self.largest_batch = max(self.largest_batch, len(batch))
+            self.wait_total += sum(started - request.queued_at for request in batch)
+            self.commit_total += elapsed
+            self.commit_max = max(self.commit_max, elapsed)
+
+
+class AsyncDatabase:
+    """
+    Асинхронна обгортка над Database для коду, що працює в event loop (бот, обробники).
+    Усі запити виконуються в окремих потоках зі своїми підключеннями, тож повільний запит
+    чи коміт, заблокований записом з Flask, не зупиняє обробку інших чатів.
+    Має ті самі методи, що й Database (select_data, insert_data, update_data, ...),
+    але кожен з них потрібно викликати через await.
+    """
+
+    def __init__(self, db_name: str, pool_size: int = 1):
+        """
+        Створює пул потоків для запитів; кожен потік працює з власним підключенням з пулу Database.
+        :param db_name: Шлях до файлу SQLite
+        :param pool_size: Кількість потоків (і підключень) для запитів
+        """
+        self._executor = ThreadPoolExecutor(max_workers=pool_size, thread_name_prefix="db")
+        self._db = Database(db_name, pool_size)
+
+    @property
+    def sync(self) -> Database:
+        """Синхронний Database, з яким працюють потоки запитів."""
+        return self._db
+
+    async def run(self, func, *args, **kwargs):
+        """Виконує func(*args, **kwargs) у потоці запитів (для репозиторіїв, див. AsyncRepository)."""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, partial(func, *args, **kwargs))
+
+    def __getattr__(self, name: str):
+        """Повертає асинхронну версію методу Database з тією ж назвою."""
+        method = getattr(Database, name, None)
+        if method is None or name.startswith("_") or not callable(method):
+            raise AttributeError(name)
+
+        async def call(*args, **kwargs):
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self._executor, partial(method, self._db, *args, **kwargs))
+
+        call.__name__ = name
+        call.__doc__ = method.__doc__
+        setattr(self, name, call)  # Кешуємо, щоб не створювати обгортку при кожному виклику
+        return call
+
+    async def close(self):
+        """Закриває підключення та зупиняє потоки запитів."""
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(self._executor, self._db.close)
+        self._executor.shutdown(wait=False)
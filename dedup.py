@@ -0,0 +1,64 @@
+# Ключі ідемпотентності для форми запису і кеш недавніх відправок
+import re
+import threading
+from collections import OrderedDict
+from hashlib import blake2b
+from time import monotonic
+from config import SUBMIT_DEDUP_WINDOW, SUBMIT_TOKEN_TTL, SUBMIT_CACHE_SIZE
+
+TOKEN_PATTERN = re.compile(r"[0-9a-f]{16,64}")  # Токен форми (uuid4().hex)
+
+
+def fingerprint(email: str, phone: str, type_: str) -> str:
+    """
+    Відбиток вмісту заявки: email без регістру, лише цифри телефону,
+    послуга без регістру і зайвих пробілів. Ім'я не враховується —
+    при повторі його часто пишуть інакше.
+    """
+    normalized = "\n".join([
+        email.strip().casefold(),
+        re.sub(r"\D", "", phone),
+        " ".join(type_.split()).casefold(),
+    ])
+    return blake2b(normalized.encode(), digest_size=16).hexdigest()
+
+
+def submission_keys(token: str, email: str, phone: str, type_: str) -> tuple:
+    """
+    Формує ключі ідемпотентності для Database.insert_data(dedup=...).
+    :param token: Токен з прихованого поля форми (некоректний або порожній ігнорується)
+    :return: Пари (ключ, вікно в секундах)
+    """
+    keys = [("fp:" + fingerprint(email, phone, type_), SUBMIT_DEDUP_WINDOW)]
+    if token and TOKEN_PATTERN.fullmatch(token):
+        keys.append(("token:" + token, SUBMIT_TOKEN_TTL))
+    return tuple(keys)
+
+
+class RecentKeys:
+    """
+    Недавно використані ключі в пам'яті процесу (LRU з вікном на кожен ключ).
+    Дозволяє відхилити повторну відправку без звернення до БД; таблиця submissions
+    залишається остаточною перевіркою (кеш може не знати про інші процеси).
+    """
+
+    def __init__(self, max_size: int = SUBMIT_CACHE_SIZE):
+        self.max_size = max_size
+        self._items: OrderedDict = OrderedDict()  # ключ → час, до якого він вважається використаним
+        self._lock = threading.Lock()  # Flask обробляє запити в кількох потоках
+
+    def seen(self, keys: tuple) -> bool:
+        """Чи використано будь-який з ключів протягом його вікна."""
+        now = monotonic()
+        with self._lock:
+            return any(self._items.get(key, 0) > now for key, _ in keys)
+
+    def add(self, keys: tuple):
+        """Запам'ятовує ключі після успішного запису."""
+        now = monotonic()
+        with self._lock:
+            for key, window in keys:
+                self._items[key] = now + window
+                self._items.move_to_end(key)
+            while len(self._items) > self.max_size:
+                self._items.popitem(last=False)
@@ -0,0 +1,58 @@
+# Канал подій між веб-сервером і ботом (без зовнішніх сервісів)
+import asyncio
+import socket
+from config import EVENT_HOST, EVENT_PORT
+
+NEW_ENTRY = b"new_entry"  # Подія: у таблицю entries додано запис
+
+# -----------------------------
+# Публікація подій (server.py)
+# -----------------------------
+_sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)  # UDP-сокет для відправки подій
+
+
+def publish_new_entry():
+    """
+    Повідомляє бота про новий запис одним UDP-датаграмом на localhost.
+    Відправка не блокує запит: якщо бот не запущений, подія просто губиться,
+    а запис підхопить резервне опитування БД.
+    """
+    try:
+        _sock.sendto(NEW_ENTRY, (EVENT_HOST, EVENT_PORT))
+    except OSError as e:
+        print(f"Не вдалося надіслати подію боту: {e}")
+
+# -----------------------------
+# Підписка на події (bot.py)
+# -----------------------------
+class _EventProtocol(asyncio.DatagramProtocol):
+    """Протокол, що будить очікувача при отриманні події."""
+
+    def __init__(self, event: asyncio.Event):
+        self.event = event
+
+    def datagram_received(self, data, addr):
+        if data == NEW_ENTRY:
+            self.event.set()
+
+
+async def listen_new_entries(event: asyncio.Event):
+    """
+    Відкриває UDP-сокет на EVENT_HOST:EVENT_PORT і встановлює event при кожній події.
+    Де є SO_REUSEPORT, порт можуть слухати кілька процесів бота, але це не розподіл навантаження:
+    ядро обирає сокет-отримувач за хешем адреси відправника, а server.py надсилає всі події з одного
+    сокета (_sock), тож усі події від процесу веб-сервера будять один і той самий процес бота.
+    Решта процесів підхоплюють чергу лише резервним опитуванням (раз на min(NOTIFY_INTERVAL, OUTBOX_LEASE)).
+    :param event: Подія asyncio, на яку чекає задача сповіщень
+    :return: Транспорт (для закриття) або None, якщо порт зайнятий
+    """
+    loop = asyncio.get_running_loop()
+    try:
+        transport, _ = await loop.create_datagram_endpoint(
+            lambda: _EventProtocol(event), local_addr=(EVENT_HOST, EVENT_PORT),
+            reuse_port=hasattr(socket, "SO_REUSEPORT") or None,
+        )
+    except OSError as e:
+        print(f"Канал подій недоступний, працюємо лише через опитування: {e}")
+        return None
+    return transport
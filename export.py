@@ -0,0 +1,95 @@
+# Вивантаження записів у CSV/XLSX без завантаження всієї таблиці в пам'ять
+import asyncio
+import csv
+import io
+from datetime import datetime
+from tempfile import SpooledTemporaryFile
+from aiogram.types.input_file import InputFile, DEFAULT_CHUNK_SIZE
+from config import DATABASE, EXPORT_BATCH_SIZE, EXPORT_SPOOL_SIZE
+from database import Database
+from repositories import EntryRepository
+
+try:  # XLSX — необов'язкова залежність
+    from openpyxl import Workbook
+except ImportError:
+    Workbook = None
+
+EXPORT_HEADERS = ["ID", "Ім'я", "Email", "Телефон", "Послуга", "Створено"]
+
+
+def export_formats() -> list:
+    """Повертає доступні формати вивантаження."""
+    return ["csv", "xlsx"] if Workbook else ["csv"]
+
+
+def _format_row(entry) -> list:
+    """Перетворює Entry на рядок файлу (Unix-час створення — на читабельну дату)."""
+    created_at = entry.created_at
+    if created_at is not None:
+        created_at = datetime.fromtimestamp(created_at).strftime("%Y-%m-%d %H:%M")
+    return [entry.id, entry.name, entry.email, entry.phone, entry.type, created_at]
+
+
+def _write_csv(rows, file) -> int:
+    """Записує записи у CSV (UTF-8 з BOM, щоб Excel коректно показував кирилицю)."""
+    text = io.TextIOWrapper(file, encoding="utf-8-sig", newline="")
+    writer = csv.writer(text)
+    writer.writerow(EXPORT_HEADERS)
+    total = 0
+    for row in rows:
+        writer.writerow(row)
+        total += 1
+    text.flush()
+    text.detach()  # Файл закриває той, хто його створив
+    return total
+
+
+def _write_xlsx(rows, file) -> int:
+    """Записує записи в XLSX у потоковому режимі openpyxl (рядки не тримаються в пам'яті)."""
+    workbook = Workbook(write_only=True)
+    sheet = workbook.create_sheet("Записи")
+    sheet.append(EXPORT_HEADERS)
+    total = 0
+    for row in rows:
+        sheet.append(row)
+        total += 1
+    workbook.save(file)
+    return total
+
+
+def build_export(fmt: str, database: str = DATABASE):
+    """
+    Формує файл вивантаження. Блокуюча функція — викликати через asyncio.to_thread.
+    Використовує окреме підключення, тож не займає потік запитів бота.
+    Записи (разом з архівом) читаються порціями (EntryRepository.iter_all) у тимчасовий файл, що переходить на диск,
+    коли стає більшим за EXPORT_SPOOL_SIZE — пам'ять не росте з розміром таблиці.
+    :param fmt: "csv" або "xlsx"
+    :param database: Шлях до файлу SQLite (AppContainer.database)
+    :return: (файл, встановлений на початок, кількість записів)
+    :raises DatabaseError: якщо читання з БД не вдалося
+    """
+    file = SpooledTemporaryFile(max_size=EXPORT_SPOOL_SIZE)
+    db = Database(database)
+    try:
+        rows = map(_format_row, EntryRepository(db).iter_all(EXPORT_BATCH_SIZE))
+        total = _write_xlsx(rows, file) if fmt == "xlsx" else _write_csv(rows, file)
+    except Exception:
+        file.close()
+        raise
+    finally:
+        db.close()
+    file.seek(0)
+    return file, total
+
+
+class SpooledInputFile(InputFile):
+    """Файл для відправки в Telegram, що читається частинами з тимчасового файлу."""
+
+    def __init__(self, file, filename: str, chunk_size: int = DEFAULT_CHUNK_SIZE):
+        super().__init__(filename=filename, chunk_size=chunk_size)
+        self.file = file
+
+    async def read(self, bot):
+        self.file.seek(0)
+        while chunk := await asyncio.to_thread(self.file.read, self.chunk_size):
+            yield chunk
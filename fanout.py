@@ -0,0 +1,146 @@
+# Паралельна розсилка повідомлень з урахуванням лімітів Telegram
+import asyncio
+import inspect
+from aiogram import Bot
+from aiogram.exceptions import (
+    TelegramRetryAfter, TelegramForbiddenError, TelegramBadRequest,
+    TelegramNetworkError, TelegramServerError,
+)
+from config import FANOUT_CONCURRENCY, FANOUT_GLOBAL_RATE, FANOUT_CHAT_RATE, FANOUT_MAX_ATTEMPTS
+from metrics import NOTIFY_SENT, NOTIFY_FAILED
+from ratelimit import TokenBucket
+
+MAX_CHAT_BUCKETS = 10000  # Скільки відер per-chat тримати в пам'яті до очищення
+
+# -----------------------------
+# Розсилка
+# -----------------------------
+class _Job:
+    """Одне повідомлення в черзі розсилки."""
+    __slots__ = ("chat_id", "text", "kwargs", "on_sent", "attempt", "reserved")
+
+    def __init__(self, chat_id: int, text: str, kwargs: dict, on_sent):
+        self.chat_id = chat_id
+        self.text = text
+        self.kwargs = kwargs
+        self.on_sent = on_sent
+        self.attempt = 0
+        self.reserved = False  # Токен чату вже зарезервовано
+
+
+class FanOut:
+    """
+    Планувальник розсилки з обмеженою паралельністю.
+    Дотримується глобального ліміту і ліміту на кожен чат (відра токенів),
+    виконує RetryAfter від Telegram і повторює невдалі відправки з експоненційною затримкою.
+    """
+
+    def __init__(self, bot: Bot, concurrency: int = FANOUT_CONCURRENCY,
+                 global_rate: float = FANOUT_GLOBAL_RATE, chat_rate: float = FANOUT_CHAT_RATE,
+                 max_attempts: int = FANOUT_MAX_ATTEMPTS):
+        self.bot = bot
+        self.concurrency = concurrency
+        self.chat_rate = chat_rate
+        self.max_attempts = max_attempts
+        self.global_bucket = TokenBucket(global_rate, global_rate)
+        self.chat_buckets: dict[int, TokenBucket] = {}
+        self.queue: asyncio.Queue = asyncio.Queue()
+        self.pending = 0  # Повідомлення в черзі або в процесі відправки (з урахуванням відкладених)
+        self.idle = asyncio.Event()
+        self.idle.set()
+        self.workers: list[asyncio.Task] = []
+
+    def start(self):
+        """Запускає робочі задачі (викликається всередині event loop)."""
+        if not self.workers:
+            self.workers = [asyncio.create_task(self._worker()) for _ in range(self.concurrency)]
+
+    async def stop(self):
+        """Зупиняє робочі задачі."""
+        for task in self.workers:
+            task.cancel()
+        await asyncio.gather(*self.workers, return_exceptions=True)
+        self.workers = []
+
+    def send(self, chat_id: int, text: str, on_sent=None, **kwargs):
+        """
+        Ставить повідомлення в чергу на відправку.
+        :param chat_id: ID чату отримувача
+        :param text: Текст повідомлення
+        :param on_sent: Необов'язкова функція on_sent(chat_id) (звичайна або async),
+                        що викликається після успішної відправки
+        :param kwargs: Додаткові параметри bot.send_message (parse_mode тощо)
+        """
+        self.start()
+        self.pending += 1
+        self.idle.clear()
+        self.queue.put_nowait(_Job(chat_id, text, kwargs, on_sent))
+
+    async def join(self):
+        """Чекає, доки всі поставлені повідомлення будуть відправлені або відкинуті."""
+        await self.idle.wait()
+
+    def _done(self):
+        """Позначає повідомлення як оброблене."""
+        self.pending -= 1
+        if self.pending == 0:
+            self.idle.set()
+
+    def _requeue_later(self, job: _Job, delay: float):
+        """Повертає повідомлення в чергу через delay секунд, не займаючи робочу задачу."""
+        asyncio.get_running_loop().call_later(delay, self.queue.put_nowait, job)
+
+    def _chat_bucket(self, chat_id: int) -> TokenBucket:
+        """Повертає відро для чату, очищаючи невикористані відра при переповненні."""
+        bucket = self.chat_buckets.get(chat_id)
+        if bucket is None:
+            if len(self.chat_buckets) >= MAX_CHAT_BUCKETS:
+                self.chat_buckets = {k: b for k, b in self.chat_buckets.items() if not b.is_full()}
+            bucket = self.chat_buckets[chat_id] = TokenBucket(self.chat_rate, 1)
+        return bucket
+
+    async def _worker(self):
+        """Робоча задача: бере повідомлення з черги і відправляє їх з урахуванням лімітів."""
+        while True:
+            job = await self.queue.get()
+
+            # Ліміт на чат: якщо чат "гарячий" — відкладаємо, щоб не блокувати інші чати.
+            # Токен резервується одразу, тому повідомлення в один чат ідуть у порядку постановки.
+            if not job.reserved:
+                job.reserved = True
+                delay = self._chat_bucket(job.chat_id).reserve()
+                if delay > 0:
+                    self._requeue_later(job, delay)
+                    continue
+
+            await self.global_bucket.acquire()  # Глобальний ліміт бота
+            try:
+                await self.bot.send_message(job.chat_id, job.text, **job.kwargs)
+                NOTIFY_SENT.inc()
+                if job.on_sent:
+                    result = job.on_sent(job.chat_id)
+                    if inspect.isawaitable(result):
+                        await result
+            except TelegramRetryAfter as e:
+                # Telegram сам каже, скільки чекати — ця спроба не рахується.
+                # Flood-wait діє на весь бот, тож зупиняємо глобальне відро для всіх робочих задач
+                self.global_bucket.pause(e.retry_after)
+                job.reserved = False
+                self._requeue_later(job, e.retry_after)
+                continue
+            except (TelegramForbiddenError, TelegramBadRequest) as e:
+                # Користувач заблокував бота або повідомлення некоректне — повтор не допоможе
+                NOTIFY_FAILED.inc("rejected")
+                print(f"Помилка надсилання повідомлення {job.chat_id}: {e}")
+            except (TelegramNetworkError, TelegramServerError, asyncio.TimeoutError) as e:
+                job.attempt += 1
+                if job.attempt < self.max_attempts:
+                    job.reserved = False
+                    self._requeue_later(job, min(2 ** job.attempt, 60))
+                    continue
+                NOTIFY_FAILED.inc("network")
+                print(f"Помилка надсилання повідомлення {job.chat_id} після {job.attempt} спроб: {e}")
+            except Exception as e:
+                NOTIFY_FAILED.inc("error")
+                print(f"Помилка надсилання повідомлення {job.chat_id}: {e}")
+            self._done()
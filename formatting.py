@@ -0,0 +1,81 @@
+# Форматування текстів повідомлень про записи
+import re
+
+MESSAGE_LIMIT = 4096  # Максимальна довжина повідомлення в Telegram (у кодових одиницях UTF-16)
+
+
+def text_length(text: str) -> int:
+    """Довжина тексту так, як її рахує Telegram (емодзі займають дві одиниці UTF-16)."""
+    return len(text.encode("utf-16-le")) // 2
+
+
+def escape_markdown(text: str) -> str:
+    """Екранує символи розмітки Markdown (_ * ` [), щоб довільний текст з форми не ламав повідомлення."""
+    return re.sub(r"([_*`\[])", r"\\\1", str(text))
+
+
+def format_entry(entry) -> str:
+    """
+    Формує текст сповіщення про новий запис.
+    :param entry: Рядок (id, name, email, phone, type)
+    """
+    return (
+        f"🆕 **Новий запис на заняття!**\n\n"
+        f"👤 Ім'я: {entry[1]}\n"
+        f"📧 Email: {entry[2]}\n"
+        f"📞 Телефон: {entry[3]}\n"
+        f"📦 Послуга: {entry[4]}"
+    )
+
+
+def format_entry_block(entry) -> str:
+    """
+    Формує блок із повними даними запису для перегляду списку.
+    :param entry: Рядок (id, name, email, phone, type)
+    """
+    return (
+        f"🆔 ID: {entry[0]}\n"
+        f"👤 Ім'я: {entry[1]}\n"
+        f"📧 Email: {entry[2]}\n"
+        f"📞 Телефон: {entry[3]}\n"
+        f"📦 Послуга: {entry[4]}\n"
+        + "─" * 30 + "\n\n"
+    )
+
+
+def format_entry_line(entry) -> str:
+    """
+    Формує короткий рядок про запис для дайджесту.
+    :param entry: Рядок (id, name, email, phone, type)
+    """
+    return f"🆔 {entry[0]} · 👤 {entry[1]} · 📞 {entry[3]} · 📦 {entry[4]}\n"
+
+
+def pack_messages(items: list, render, header: str = "", limit: int = MESSAGE_LIMIT) -> list:
+    """
+    Розкладає елементи по повідомленнях так, щоб кожне вміщалося в ліміт Telegram.
+    Блок одного елемента ніколи не розрізається між повідомленнями (надто довгий — обрізається).
+    :param items: Елементи для відображення
+    :param render: Функція, що перетворює елемент на блок тексту
+    :param header: Заголовок на початку кожного повідомлення
+    :param limit: Максимальна довжина повідомлення
+    :return: Список пар (текст повідомлення, елементи цього повідомлення)
+    """
+    pages = []
+    header_length = text_length(header)
+    text, page, length = header, [], header_length
+    for item in items:
+        block = render(item)
+        block_length = text_length(block)
+        if header_length + block_length > limit:
+            block = block[:(limit - header_length) // 2 - 1] + "…"  # З запасом на символи з двох одиниць
+            block_length = text_length(block)
+        if page and length + block_length > limit:
+            pages.append((text, page))
+            text, page, length = header, [], header_length
+        text += block
+        page.append(item)
+        length += block_length
+    if page:
+        pages.append((text, page))
+    return pages
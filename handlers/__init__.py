@@ -1,6 +1,7 @@
 # Експорт обробників повідомлень
 from .start import router as start_router
 from .messages import router as messages_router
+from .edit import router as edit_router
 
-__all__ = ['start_router', 'messages_router']
+__all__ = ['start_router', 'messages_router', 'edit_router']
 
@@ -0,0 +1,292 @@
+# Обробники редагування записів: вибір запису кнопками і зміна кількох полів одним повідомленням
+import re
+from aiogram import Router, F
+from aiogram.filters import Command, CommandObject
+from aiogram.fsm.context import FSMContext
+from aiogram.exceptions import TelegramBadRequest
+from aiogram.types import Message, CallbackQuery
+from repositories import AsyncRepository
+from config import EDIT_PAGE_SIZE
+from states import EditState
+from middlewares import UserProfile
+from keyboards import EditPage, EditEntry, get_edit_picker, get_edit_card_menu
+
+# Ініціалізація роутера для редагування
+router = Router()
+
+NEWEST = 2 ** 63 - 1  # Курсор "від найновіших" (максимальний INTEGER у SQLite)
+MAX_FIELD_LENGTH = 100  # Максимальна довжина значення поля
+
+# Назви полів у повідомленні зі змінами (англійською або українською) → поле в БД
+FIELD_ALIASES = {
+    "name": "name", "імя": "name",
+    "email": "email", "пошта": "email",
+    "phone": "phone", "телефон": "phone",
+    "type": "type", "послуга": "type",
+}
+FIELD_LABELS = {"name": "Ім'я", "email": "Email", "phone": "Телефон", "type": "Послуга"}
+
+# Початок пари "поле=значення"; значення триває до наступної пари або кінця повідомлення
+CHANGE_PATTERN = re.compile(
+    r"(?:^|(?<=\s))(name|email|phone|type|ім['’ʼ]?я|пошта|телефон|послуга)\s*=", re.IGNORECASE
+)
+EMAIL_PATTERN = re.compile(r"[^@\s]+@[^@\s]+\.[^@\s]+")
+PHONE_PATTERN = re.compile(r"\+?[\d\s()\-]+")
+ID_PATTERN = re.compile(r"[0-9]{1,18}")  # ID запису в /edit (не більше 18 цифр — завжди в межах INTEGER)
+
+EDIT_HINT = (
+    "Надішліть зміни одним повідомленням, наприклад:\n"
+    "phone=+380501234567 email=olena@example.com\n"
+    "Поля: name (ім'я), email, phone (телефон), type (послуга)"
+)
+
+# -----------------------------
+# Розбір і перевірка змін
+# -----------------------------
+def validate_field(field: str, value: str):
+    """
+    Перевіряє нове значення поля.
+    :return: Текст помилки або None, якщо значення коректне
+    """
+    label = FIELD_LABELS[field]
+    if not value:
+        return f"{label}: значення порожнє"
+    if len(value) > MAX_FIELD_LENGTH:
+        return f"{label}: не довше {MAX_FIELD_LENGTH} символів"
+    if field == "email" and not EMAIL_PATTERN.fullmatch(value):
+        return f"{label}: некоректна адреса"
+    if field == "phone":
+        digits = len(re.sub(r"\D", "", value))
+        if not PHONE_PATTERN.fullmatch(value) or not 7 <= digits <= 15:
+            return f"{label}: некоректний номер"
+    return None
+
+
+def parse_changes(text: str):
+    """
+    Розбирає повідомлення на кшталт "phone=+380... email=a@b.com" (пари через пробіл або з нового рядка;
+    значення може містити пробіли — воно триває до наступної пари).
+    :return: (зміни {поле: значення}, список помилок)
+    """
+    matches = list(CHANGE_PATTERN.finditer(text))
+    if not matches:
+        return {}, ["Не знайдено жодного поля у форматі поле=значення"]
+
+    errors = []
+    if text[:matches[0].start()].strip():
+        errors.append("Текст перед першим полем не розпізнано")
+
+    changes = {}
+    for match, following in zip(matches, matches[1:] + [None]):
+        key = re.sub(r"['’ʼ]", "", match.group(1).lower())
+        field = FIELD_ALIASES[key]
+        value = text[match.end():following.start() if following else len(text)].strip()
+        if field in changes:
+            errors.append(f"{FIELD_LABELS[field]}: вказано двічі")
+            continue
+        error = validate_field(field, value)
+        if error:
+            errors.append(error)
+        changes[field] = value
+    return changes, errors
+
+
+def format_edit_card(entry) -> str:
+    """Картка редагування: поточні значення запису і підказка формату змін."""
+    return (
+        f"✏️ Запис #{entry.id}\n\n"
+        f"👤 Ім'я: {entry.name}\n"
+        f"📧 Email: {entry.email}\n"
+        f"📞 Телефон: {entry.phone}\n"
+        f"📦 Послуга: {entry.type}\n\n"
+        + EDIT_HINT
+    )
+
+# -----------------------------
+# Вибір запису
+# -----------------------------
+async def render_picker(entries: AsyncRepository, direction: str, cursor: int):
+    """
+    Готує сторінку списку вибору (від найновіших записів) одним запитом:
+    читається на один запис більше, щоб знати, чи є наступна сторінка в цьому напрямку.
+    :param entries: Репозиторій записів
+    :param direction: "older" — записи перед cursor, "newer" — записи після cursor
+    :param cursor: id-межа сторінки (0 — від найновіших)
+    :return: (текст, клавіатура) або None, якщо записів немає
+    """
+    if direction == "newer":
+        rows = await entries.page_after(cursor, EDIT_PAGE_SIZE + 1)
+        has_older, has_newer = True, len(rows) > EDIT_PAGE_SIZE
+        rows = rows[:EDIT_PAGE_SIZE][::-1]
+    else:
+        rows = await entries.page_before(cursor or NEWEST, EDIT_PAGE_SIZE + 1)
+        has_older, has_newer = len(rows) > EDIT_PAGE_SIZE, cursor != 0
+        rows = rows[:EDIT_PAGE_SIZE]
+    if not rows:
+        return None
+    text = "📝 Оберіть запис для редагування (нові — першими).\n💡 Або надішліть /edit ID"
+    return text, get_edit_picker(rows, has_older, has_newer)
+
+
+async def open_card(entries: AsyncRepository, state: FSMContext, entry_id: int):
+    """
+    Читає запис з версією і переводить користувача в очікування змін.
+    :return: (текст картки, клавіатура) або None, якщо запису немає
+    """
+    if not 0 < entry_id <= NEWEST:
+        return None  # Поза діапазоном INTEGER у SQLite — такого запису бути не може
+    entry = await entries.get_versioned(entry_id)
+    if entry is None:
+        return None
+    await state.set_data({"record_id": entry.id, "version": entry.version})
+    await state.set_state(EditState.waiting_changes)
+    return format_edit_card(entry), get_edit_card_menu()
+
+
+@router.message(F.text == "✏️ Редагувати")
+async def start_edit(message: Message, state: FSMContext, profile: UserProfile, entries: AsyncRepository):
+    """
+    Обробник кнопки "✏️ Редагувати".
+    Показує першу сторінку списку вибору запису (кнопки під повідомленням).
+    """
+    if not profile or not profile.registered:
+        await message.answer("🚫 У вас немає доступу.")
+        return
+
+    await state.clear()  # Попередню картку чи незавершений пошук закинуто
+
+    result = await render_picker(entries, "older", 0)
+    if not result:
+        await message.answer("📭 Немає записів для редагування.")
+        return
+
+    text, markup = result
+    await message.answer(text, reply_markup=markup)
+
+
+@router.message(Command("edit"))
+async def cmd_edit(message: Message, command: CommandObject, state: FSMContext, profile: UserProfile,
+                   entries: AsyncRepository):
+    """
+    Обробник команди /edit.
+    З ID (/edit 15) одразу відкриває картку запису, без ID — показує список вибору.
+    """
+    if not command.args:
+        await start_edit(message, state, profile, entries)
+        return
+    if not profile or not profile.registered:
+        await message.answer("🚫 У вас немає доступу.")
+        return
+
+    entry_id = command.args.strip()
+    if not ID_PATTERN.fullmatch(entry_id):
+        await message.answer("❌ Вкажіть числовий ID запису: /edit 15")
+        return
+
+    result = await open_card(entries, state, int(entry_id))
+    if not result:
+        await message.answer("❌ Запис з таким ID не знайдено (або його перенесено в архів).")
+        return
+
+    text, markup = result
+    await message.answer(text, reply_markup=markup)
+
+
+@router.callback_query(EditPage.filter())
+async def page_edit_picker(callback: CallbackQuery, callback_data: EditPage, state: FSMContext,
+                           profile: UserProfile, entries: AsyncRepository):
+    """
+    Обробник кнопок гортання списку вибору і кнопки "⬅️ До списку" на картці.
+    Редагує повідомлення на місці.
+    """
+    if not profile or not profile.registered:
+        await callback.answer("🚫 У вас немає доступу.")
+        return
+
+    result = await render_picker(entries, callback_data.direction, callback_data.cursor)
+    if not result:
+        await callback.answer("📭 Більше записів немає.")
+        return
+
+    if await state.get_state() == EditState.waiting_changes.state:
+        await state.clear()  # Повернулись до списку — картку закрито
+
+    text, markup = result
+    try:
+        await callback.message.edit_text(text, reply_markup=markup)
+    except TelegramBadRequest:
+        pass  # Сторінка не змінилась (повторне натискання)
+    await callback.answer()
+
+
+@router.callback_query(EditEntry.filter(F.action == "open"))
+async def pick_entry(callback: CallbackQuery, callback_data: EditEntry, state: FSMContext,
+                     profile: UserProfile, entries: AsyncRepository):
+    """
+    Обробник кнопки запису у списку вибору.
+    Перетворює повідомлення зі списком на картку редагування з поточними значеннями.
+    """
+    if not profile or not profile.registered:
+        await callback.answer("🚫 У вас немає доступу.")
+        return
+
+    result = await open_card(entries, state, callback_data.entry_id)
+    if not result:
+        await callback.answer("❌ Запис не знайдено (або його перенесено в архів).", show_alert=True)
+        return
+
+    text, markup = result
+    await callback.message.edit_text(text, reply_markup=markup)
+    await callback.answer()
+
+
+@router.callback_query(EditEntry.filter(F.action == "cancel"))
+async def cancel_edit(callback: CallbackQuery, state: FSMContext):
+    """
+    Обробник кнопки "❌ Скасувати" у списку вибору чи на картці.
+    Скасовує редагування і прибирає кнопки.
+    """
+    if await state.get_state() == EditState.waiting_changes.state:
+        await state.clear()
+    await callback.message.edit_text("❌ Редагування скасовано.")
+    await callback.answer()
+
+# -----------------------------
+# Збереження змін
+# -----------------------------
+@router.message(EditState.waiting_changes)
+async def process_changes(message: Message, state: FSMContext, entries: AsyncRepository):
+    """
+    Обробник повідомлення зі змінами ("phone=... email=...").
+    Перевіряє всі поля і записує їх одним UPDATE з перевіркою версії запису:
+    якщо запис тим часом змінив інший адміністратор, показує актуальні значення замість перезапису.
+    """
+    if not message.text:
+        await message.answer("❌ Надішліть зміни текстом.\n\n" + EDIT_HINT)
+        return
+
+    changes, errors = parse_changes(message.text)
+    if errors:
+        await message.answer("❌ " + "\n❌ ".join(errors) + "\n\nВиправте та надішліть ще раз.")
+        return
+
+    data = await state.get_data()
+    record_id = data["record_id"]
+    if await entries.update_fields(record_id, data["version"], changes):
+        await state.clear()
+        summary = "\n".join(f"{FIELD_LABELS[field]} → {value}" for field, value in changes.items())
+        await message.answer(f"✅ Запис #{record_id} оновлено!\n{summary}")
+        return
+
+    # Версія не збіглась: запис змінено іншим адміністратором або видалено
+    entry = await entries.get_versioned(record_id)
+    if entry is None:
+        await state.clear()
+        await message.answer("❌ Запис більше не існує (видалено або перенесено в архів).")
+        return
+    await state.update_data(version=entry.version)
+    await message.answer(
+        "⚠️ Запис щойно змінив інший адміністратор, ваші зміни не збережено.\n"
+        "Перевірте актуальні значення і надішліть зміни ще раз.\n\n" + format_edit_card(entry),
+        reply_markup=get_edit_card_menu()
+    )
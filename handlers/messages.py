@@ -1,203 +1,129 @@
 # Обробники текстових повідомлень від користувачів
+import asyncio
+from datetime import datetime
 from aiogram import Router, F
+from aiogram.filters import Command, CommandObject
 from aiogram.fsm.context import FSMContext
-from aiogram.types import Message
-from database import Database
-from config import DATABASE
-from states import EditState
-from keyboards import get_main_menu, get_edit_menu
+from aiogram.exceptions import TelegramBadRequest
+from aiogram.types import Message, CallbackQuery
+from container import AppContainer
+from repositories import AsyncRepository
+from config import DIGEST_WINDOW, ENTRIES_PAGE_FETCH, SEARCH_LIMIT
+from states import SearchState
+from middlewares import UserProfile, ProfileCache
+from keyboards import get_main_menu, MAIN_MENU_BUTTONS, EntriesPage, get_entries_pager
+from formatting import format_entry_block, pack_messages
+from export import build_export, export_formats, SpooledInputFile
 
 # Ініціалізація роутера для текстових повідомлень
 router = Router()
 
-# Глобальний екземпляр бази даних
-db = Database(DATABASE)
-
 # -----------------------------
-# Допоміжна функція перевірки авторизації
+# Перегляд записів
 # -----------------------------
-def is_authorized(chat_id: int) -> bool:
+ENTRIES_HEADER = "📋 **Записи клієнтів:**\n\n"
+
+
+async def render_entries_page(entries: AsyncRepository, direction: str, cursor: int):
     """
-    Перевіряє чи авторизований користувач.
-    :param chat_id: ID чату користувача
-    :return: True якщо користувач авторизований, False інакше
+    Готує одну сторінку записів (keyset-пагінація за id).
+    Читає не більше ENTRIES_PAGE_FETCH рядків індексованим запитом і відбирає стільки,
+    скільки вміщується в одне повідомлення Telegram.
+    :param entries: Репозиторій записів (AsyncRepository(db, EntryRepository))
+    :param direction: "next" — записи після cursor, "prev" — записи перед cursor
+    :param cursor: id-межа сторінки
+    :return: (текст, клавіатура) або None, якщо записів немає
     """
-    result = db.select_data("users", ["registered"], "chat_id = ?", (chat_id,))
-    return result and len(result) > 0 and result[0][0] == 1
+    if direction == "prev":
+        rows = await entries.page_before(cursor, ENTRIES_PAGE_FETCH)  # Від найближчих до cursor
+    else:
+        rows = await entries.page_after(cursor, ENTRIES_PAGE_FETCH)
+    if not rows:
+        return None
+
+    text, page = pack_messages(rows, format_entry_block, ENTRIES_HEADER)[0]
+    if direction == "prev":
+        # Відібрано від найближчих до cursor: ті самі (обрізані) блоки в порядку показу вміщуються так само
+        text, page = pack_messages(page[::-1], format_entry_block, ENTRIES_HEADER)[0]
+
+    first_id, last_id = page[0].id, page[-1].id
+    markup = get_entries_pager(
+        first_id, last_id,
+        has_prev=await entries.has_before(first_id),
+        has_next=await entries.has_after(last_id),
+    )
+    return text, markup
+
 
-# -----------------------------
-# Перегляд записів
-# -----------------------------
 @router.message(F.text == "📋 Записи")
-async def view_entries(message: Message):
+async def view_entries(message: Message, profile: UserProfile, entries: AsyncRepository):
     """
     Обробник кнопки "📋 Записи".
-    Виводить всі записи клієнтів з бази даних.
+    Виводить першу сторінку записів клієнтів з кнопками гортання.
     """
-    if not is_authorized(message.chat.id):
+    if not profile or not profile.registered:
         await message.answer("🚫 У вас немає доступу. Використайте /start")
         return
 
-    # Отримуємо всі записи з БД
-    entries = db.select_data("entries")
-    if not entries:
+    result = await render_entries_page(entries, "next", 0)
+    if not result:
         await message.answer("📭 Поки що немає записів на заняття.")
         return
 
-    # Формуємо текст з усіма записами
-    text = "📋 **Записи клієнтів:**\n\n"
-    for entry in entries:
-        text += f"🆔 ID: {entry[0]}\n"
-        text += f"👤 Ім'я: {entry[1]}\n"
-        text += f"📧 Email: {entry[2]}\n"
-        text += f"📞 Телефон: {entry[3]}\n"
-        text += f"📦 Послуга: {entry[4]}\n"
-        text += "─" * 30 + "\n\n"
-    
-    await message.answer(text, parse_mode="Markdown")
-
-# -----------------------------
-# Редагування - початок
-# -----------------------------
-@router.message(F.text == "✏️ Редагувати")
-async def start_edit(message: Message, state: FSMContext):
-    """
-    Обробник кнопки "✏️ Редагувати".
-    Показує список доступних записів та просить ввести ID для редагування.
-    """
-    if not is_authorized(message.chat.id):
-        await message.answer("🚫 У вас немає доступу.")
-        return
-
-    # Отримуємо список записів
-    entries = db.select_data("entries", ["id", "name"])
-    if not entries:
-        await message.answer("📭 Немає записів для редагування.")
-        return
+    text, markup = result
+    await message.answer(text, parse_mode="Markdown", reply_markup=markup)
 
-    # Формуємо список доступних записів
-    text = "📝 Доступні записи:\n\n"
-    for entry in entries:
-        text += f"🆔 {entry[0]} - {entry[1]}\n"
-    
-    text += "\n💡 Введіть ID запису для редагування:"
-    await message.answer(text)
-    await state.set_state(EditState.waiting_id)
 
-# -----------------------------
-# Редагування - обробка ID
-# -----------------------------
-@router.message(EditState.waiting_id)
-async def process_edit_id(message: Message, state: FSMContext):
+@router.callback_query(EntriesPage.filter())
+async def page_entries(callback: CallbackQuery, callback_data: EntriesPage, profile: UserProfile,
+                       entries: AsyncRepository):
     """
-    Обробник стану очікування ID запису.
-    Перевіряє чи існує запис з введеним ID та переходить до вибору поля.
+    Обробник кнопок "⬅️ Назад"/"Далі ➡️".
+    Редагує повідомлення на місці, показуючи сусідню сторінку записів.
     """
-    # Перевірка чи введено число
-    if not message.text.isdigit():
-        await message.answer("❌ Введіть числовий ID запису:")
+    if not profile or not profile.registered:
+        await callback.answer("🚫 У вас немає доступу.")
         return
-    
-    record_id = int(message.text)
-    # Перевірка чи існує запис з таким ID
-    result = db.select_data("entries", ["id"], "id = ?", (record_id,))
-    
-    if not result or len(result) == 0:
-        await message.answer("❌ Запис з таким ID не знайдено. Спробуйте ще раз:")
-        return
-    
-    # Зберігаємо ID та переходимо до вибору поля
-    await state.update_data(record_id=record_id)
-    await message.answer("✏️ Оберіть поле для редагування:", reply_markup=get_edit_menu())
-    await state.set_state(EditState.waiting_field)
 
-# -----------------------------
-# Редагування - скасування
-# -----------------------------
-@router.message(EditState.waiting_field, F.text == "❌ Скасувати")
-async def cancel_edit(message: Message, state: FSMContext):
-    """
-    Обробник кнопки "❌ Скасувати" під час редагування.
-    Скасовує процес редагування та повертає до головного меню.
-    """
-    await state.clear()
-    await message.answer("❌ Редагування скасовано.", reply_markup=get_main_menu())
-
-# -----------------------------
-# Редагування - обробка вибору поля
-# -----------------------------
-@router.message(EditState.waiting_field)
-async def process_edit_field(message: Message, state: FSMContext):
-    """
-    Обробник вибору поля для редагування.
-    Перевіряє вибране поле та просить ввести нове значення.
-    """
-    # Відображення назв кнопок на поля БД
-    field_map = {
-        "Ім'я": "name",
-        "Email": "email",
-        "Телефон": "phone",
-        "Послуга": "service"
-    }
-    
-    field = field_map.get(message.text)
-    if not field:
-        await message.answer("❌ Оберіть поле з меню:")
+    result = await render_entries_page(entries, callback_data.direction, callback_data.cursor)
+    if not result:
+        await callback.answer("📭 Більше записів немає.")
         return
-    
-    # Зберігаємо поле та переходимо до введення значення
-    await state.update_data(field=field)
-    await message.answer(f"✍️ Введіть нове значення для поля '{message.text}':")
-    await state.set_state(EditState.waiting_value)
 
-# -----------------------------
-# Редагування - обробка нового значення
-# -----------------------------
-@router.message(EditState.waiting_value)
-async def process_edit_value(message: Message, state: FSMContext):
-    """
-    Обробник введення нового значення поля.
-    Оновлює запис у базі даних з новим значенням.
-    """
-    # Отримуємо дані зі стану
-    data = await state.get_data()
-    record_id = data['record_id']
-    field = data['field']
-    new_value = message.text
-    
-    # Оновлюємо запис у БД
-    db.update_data("entries", {field: new_value}, "id = ?", (record_id,))
-    await message.answer(
-        f"✅ Запис #{record_id} оновлено!\n{field} → {new_value}",
-        reply_markup=get_main_menu()
-    )
-    await state.clear()
+    text, markup = result
+    try:
+        await callback.message.edit_text(text, parse_mode="Markdown", reply_markup=markup)
+    except TelegramBadRequest:
+        pass  # Сторінка не змінилась (повторне натискання)
+    await callback.answer()
 
 # -----------------------------
 # Сповіщення
 # -----------------------------
 @router.message(F.text == "🔔 Сповіщення")
-async def toggle_notifications(message: Message):
+async def toggle_notifications(message: Message, profile: UserProfile, profile_cache: ProfileCache,
+                               users: AsyncRepository):
     """
     Обробник кнопки "🔔 Сповіщення".
     Перемикає статус сповіщень користувача (увімкнути/вимкнути).
     """
-    if not is_authorized(message.chat.id):
+    if not profile or not profile.registered:
         await message.answer("🚫 У вас немає доступу.")
         return
 
-    # Отримуємо поточний статус сповіщень
-    result = db.select_data("users", ["notify"], "chat_id = ?", (message.chat.id,))
-    current_state = result[0][0] if result and len(result) > 0 else 0
-    new_state = 0 if current_state == 1 else 1  # Перемикаємо стан
+    # Перемикаємо поточний статус сповіщень (з профілю)
+    new_state = 0 if profile.notify == 1 else 1
     
     # Оновлюємо статус у БД
-    db.update_data("users", {"notify": new_state}, "chat_id = ?", (message.chat.id,))
+    await users.set_notify(message.chat.id, new_state)
+    profile_cache.invalidate(message.chat.id)
     
     if new_state == 1:
         await message.answer(
             "🔔 **Сповіщення увімкнені** ✅\n\n"
-            "Ви отримуватимете повідомлення про нові записи клієнтів.", 
+            "Ви отримуватимете повідомлення про нові записи клієнтів "
+            + ("дайджестом." if profile.digest == 1 else "одразу.")
+            + "\n🗂 Змінити режим — кнопка «Дайджест».", 
             parse_mode="Markdown"
         )
     else:
@@ -207,6 +133,72 @@ async def toggle_notifications(message: Message):
             parse_mode="Markdown"
         )
 
+# -----------------------------
+# Режим сповіщень (миттєві / дайджест)
+# -----------------------------
+@router.message(F.text == "🗂 Дайджест")
+async def toggle_digest(message: Message, profile: UserProfile, profile_cache: ProfileCache,
+                        users: AsyncRepository):
+    """
+    Обробник кнопки "🗂 Дайджест".
+    Перемикає режим сповіщень: окреме повідомлення на кожен запис або один зведений дайджест.
+    """
+    if not profile or not profile.registered:
+        await message.answer("🚫 У вас немає доступу.")
+        return
+
+    # Перемикаємо поточний режим (з профілю)
+    new_mode = 0 if profile.digest == 1 else 1
+
+    # Оновлюємо режим у БД
+    await users.set_digest(message.chat.id, new_mode)
+    profile_cache.invalidate(message.chat.id)
+
+    if new_mode == 1:
+        await message.answer(
+            "🗂 **Режим дайджесту** ✅\n\n"
+            f"Нові записи надходитимуть одним повідомленням раз на {DIGEST_WINDOW:g} с.",
+            parse_mode="Markdown"
+        )
+    else:
+        await message.answer(
+            "⚡ **Миттєві сповіщення** ✅\n\n"
+            "Кожен новий запис надходитиме окремим повідомленням.",
+            parse_mode="Markdown"
+        )
+
+# -----------------------------
+# Вивантаження записів
+# -----------------------------
+@router.message(Command("export"))
+async def cmd_export(message: Message, command: CommandObject, profile: UserProfile, app: AppContainer):
+    """
+    Обробник команди /export [csv|xlsx].
+    Формує файл з усіма записами поза event loop і надсилає його документом.
+    """
+    if not profile or not profile.registered:
+        await message.answer("🚫 У вас немає доступу.")
+        return
+
+    fmt = (command.args or "csv").strip().lower()
+    if fmt not in export_formats():
+        await message.answer(f"❌ Доступні формати: {', '.join(export_formats())}")
+        return
+
+    await message.answer("⏳ Готую файл...")
+    try:
+        file, total = await asyncio.to_thread(build_export, fmt, app.database)
+    except Exception as e:
+        print(f"Помилка вивантаження: {e}")
+        await message.answer("❌ Не вдалося сформувати файл.")
+        return
+
+    filename = f"entries_{datetime.now():%Y-%m-%d}.{fmt}"
+    try:
+        await message.answer_document(SpooledInputFile(file, filename), caption=f"📤 Записів: {total}")
+    finally:
+        file.close()
+
 # -----------------------------
 # Допомога
 # -----------------------------
@@ -220,16 +212,87 @@ async def cmd_help(message: Message):
 📖 **Довідка по боту**
 
 **Основні функції:**
-📋 Записи - Перегляд всіх записів клієнтів
-✏️ Редагувати - Зміна даних запису
+📋 Записи - Перегляд записів клієнтів (по сторінках)
+🔍 Пошук - Пошук запису за ім'ям, email, телефоном чи послугою
+✏️ Редагувати - Зміна кількох полів запису одним повідомленням
 🔔 Сповіщення - Увімкнути/вимкнути повідомлення про нові записи
+🗂 Дайджест - Отримувати нові записи одним зведеним повідомленням
 ℹ️ Допомога - Ця довідка
 
 **Команди:**
 /start - Перезапуск бота
 /status - Статус підключення
+/search текст - Швидкий пошук записів
+/edit ID - Редагувати запис за ID
+/export - Вивантажити всі записи у файл (csv або xlsx)
 
 💡 Записи надходять автоматично з сайту.
     """
     await message.answer(help_text, parse_mode="Markdown")
 
+# -----------------------------
+# Пошук записів
+# -----------------------------
+async def answer_search(message: Message, entries: AsyncRepository, text: str):
+    """
+    Виконує пошук і надсилає всі знайдені записи (кілька повідомлень, якщо не вміщаються в одне).
+    :param message: Повідомлення, на яке відповідаємо
+    :param entries: Репозиторій записів
+    :param text: Текст запиту
+    """
+    found = await entries.search(text, SEARCH_LIMIT)
+    if not found:
+        await message.answer("🔍 Нічого не знайдено.", reply_markup=get_main_menu())
+        return
+
+    header = f"🔍 **Знайдено ({len(found)}):**\n\n"
+    pages = pack_messages(found, format_entry_block, header)
+    for number, (result_text, _) in enumerate(pages, 1):
+        markup = get_main_menu() if number == len(pages) else None  # Меню — під останнім повідомленням
+        await message.answer(result_text, parse_mode="Markdown", reply_markup=markup)
+
+
+@router.message(Command("search"))
+async def cmd_search(message: Message, command: CommandObject, state: FSMContext, profile: UserProfile,
+                     entries: AsyncRepository):
+    """
+    Обробник команди /search.
+    З текстом (/search Олена) шукає одразу, без тексту — просить ввести запит.
+    """
+    if not profile or not profile.registered:
+        await message.answer("🚫 У вас немає доступу.")
+        return
+
+    if command.args:
+        await answer_search(message, entries, command.args)
+        return
+    await message.answer("🔍 Введіть ім'я, email, телефон або послугу (можна початок слова):")
+    await state.set_state(SearchState.waiting_query)
+
+
+@router.message(F.text == "🔍 Пошук")
+async def start_search(message: Message, state: FSMContext, profile: UserProfile):
+    """
+    Обробник кнопки "🔍 Пошук".
+    Просить ввести текст запиту.
+    """
+    if not profile or not profile.registered:
+        await message.answer("🚫 У вас немає доступу.")
+        return
+
+    await message.answer("🔍 Введіть ім'я, email, телефон або послугу (можна початок слова):")
+    await state.set_state(SearchState.waiting_query)
+
+
+@router.message(SearchState.waiting_query, ~F.text.in_(MAIN_MENU_BUTTONS), ~F.text.startswith("/"))
+async def process_search(message: Message, state: FSMContext, entries: AsyncRepository):
+    """
+    Обробник стану очікування запиту.
+    Кнопки меню і команди не вважаються запитом, тож під час пошуку їх обробляють
+    власні обробники, зокрема з роутерів, підключених після цього (редагування).
+    """
+    await state.clear()
+    if not message.text:
+        await message.answer("❌ Введіть текст для пошуку.")
+        return
+    await answer_search(message, entries, message.text)
@@ -3,52 +3,40 @@ from aiogram import Router, F
 from aiogram.filters import Command
 from aiogram.fsm.context import FSMContext
 from aiogram.types import Message
-from database import Database
-from config import ACCESS_CODE, DATABASE
+from database import AsyncDatabase
+from repositories import AsyncRepository
+from config import ACCESS_CODE
 from states import AuthState
+from middlewares import UserProfile, ProfileCache
 from keyboards import get_main_menu
+from formatting import escape_markdown
 
 # Ініціалізація роутера для команд
 router = Router()
 
-# Глобальний екземпляр бази даних
-db = Database(DATABASE)
-
-# -----------------------------
-# Допоміжна функція перевірки авторизації
-# -----------------------------
-def is_authorized(chat_id: int) -> bool:
-    """
-    Перевіряє чи авторизований користувач.
-    :param chat_id: ID чату користувача
-    :return: True якщо користувач авторизований, False інакше
-    """
-    result = db.select_data("users", ["registered"], "chat_id = ?", (chat_id,))
-    return result and len(result) > 0 and result[0][0] == 1
+STATUS_TOP_TYPES = 10  # Скільки послуг показувати в /status
 
 # -----------------------------
 # Команда /start
 # -----------------------------
 @router.message(Command("start"))
-async def cmd_start(message: Message, state: FSMContext):
+async def cmd_start(message: Message, state: FSMContext, profile: UserProfile, profile_cache: ProfileCache,
+                    users: AsyncRepository):
     """
     Обробник команди /start.
     Перевіряє чи є користувач у базі даних та чи авторизований він.
     Якщо ні - просить ввести пароль.
     """
-    result = db.select_data("users", ["chat_id", "registered"], "chat_id = ?", (message.chat.id,))
-    
     # Якщо користувача немає в БД - створюємо нового
-    if not result or len(result) == 0:
-        db.insert_data("users", ["chat_id", "username", "registered", "notify"],
-                      (message.chat.id, message.from_user.username or "Unknown", 0, 0))
+    if not profile:
+        await users.create(message.chat.id, message.from_user.username or "Unknown")
+        profile_cache.invalidate(message.chat.id)
         await message.answer("👋 Вітаю! Для доступу до функцій бота введіть пароль:")
         await state.set_state(AuthState.waiting_password)
         return
     
     # Перевіряємо статус авторизації
-    user = result[0]
-    if user[1] == 1:  # Користувач авторизований
+    if profile.registered == 1:  # Користувач авторизований
         await message.answer("✅ Ви авторизовані! Оберіть дію:", reply_markup=get_main_menu())
     else:  # Користувач не авторизований
         await message.answer("🔐 Введіть пароль для доступу:")
@@ -57,15 +45,18 @@ async def cmd_start(message: Message, state: FSMContext):
 # -----------------------------
 # Авторизація (обробка пароля)
 # -----------------------------
-@router.message(AuthState.waiting_password)
-async def process_password(message: Message, state: FSMContext):
+@router.message(AuthState.waiting_password, flags={"throttle": "login"})
+async def process_password(message: Message, state: FSMContext, profile_cache: ProfileCache,
+                           users: AsyncRepository):
     """
     Обробник стану очікування пароля.
     Перевіряє правильність введеного пароля та авторизує користувача.
+    Кількість спроб обмежена (LOGIN_ATTEMPTS за LOGIN_WINDOW, див. ThrottlingMiddleware).
     """
     if message.text == ACCESS_CODE:
         # Пароль правильний - авторизуємо користувача
-        db.update_data("users", {"registered": 1}, "chat_id = ?", (message.chat.id,))
+        await users.set_registered(message.chat.id)
+        profile_cache.invalidate(message.chat.id)
         await message.answer("✅ Успішно авторизовано!", reply_markup=get_main_menu())
         await state.clear()
     else:
@@ -85,14 +76,19 @@ async def cmd_help(message: Message):
 📖 **Довідка по боту**
 
 **Основні функції:**
-📋 Записи - Перегляд всіх записів клієнтів
-✏️ Редагувати - Зміна даних запису
+📋 Записи - Перегляд записів клієнтів (по сторінках)
+🔍 Пошук - Пошук запису за ім'ям, email, телефоном чи послугою
+✏️ Редагувати - Зміна кількох полів запису одним повідомленням
 🔔 Сповіщення - Увімкнути/вимкнути повідомлення про нові записи
+🗂 Дайджест - Отримувати нові записи одним зведеним повідомленням
 ℹ️ Допомога - Ця довідка
 
 **Команди:**
 /start - Перезапуск бота
 /status - Статус підключення
+/search текст - Швидкий пошук записів
+/edit ID - Редагувати запис за ID
+/export - Вивантажити всі записи у файл (csv або xlsx)
 
 💡 Записи надходять автоматично з сайту.
     """
@@ -102,24 +98,27 @@ async def cmd_help(message: Message):
 # Команда /status
 # -----------------------------
 @router.message(Command("status"))
-async def cmd_status(message: Message):
+async def cmd_status(message: Message, profile: UserProfile, db: AsyncDatabase):
     """
     Обробник команди /status.
     Виводить поточний статус бота та статистику.
     """
-    if not is_authorized(message.chat.id):
+    if not profile or not profile.registered:
         await message.answer("🚫 У вас немає доступу.")
         return
     
-    # Отримуємо статистику
-    total_entries = len(db.select_data("entries"))
-    result = db.select_data("users", ["notify"], "chat_id = ?", (message.chat.id,))
-    notify_status = "увімкнені ✅" if (result and len(result) > 0 and result[0][0] == 1) else "вимкнені ❌"
+    # Отримуємо статистику з лічильників (без читання таблиці записів)
+    stats = await db.get_stats()
+    notify_status = "увімкнені ✅" if profile.notify == 1 else "вимкнені ❌"
+    types_text = "".join(
+        f"  • {escape_markdown(name)}: {count}\n" for name, count in stats["types"][:STATUS_TOP_TYPES]
+    )
     
     await message.answer(
         f"📊 **Статус:**\n\n"
-        f"📋 Всього записів: {total_entries}\n"
-        f"🔔 Сповіщення: {notify_status}",
+        f"📋 Всього записів: {stats['total']}\n"
+        f"🗓 Нових за сьогодні: {stats['today']}\n"
+        + (f"📦 За послугами:\n{types_text}" if types_text else "")
+        + f"🔔 Сповіщення: {notify_status}",
         parse_mode="Markdown"
     )
-
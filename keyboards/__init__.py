@@ -1,5 +1,11 @@
 # Експорт клавіатур
-from .reply import get_main_menu, get_edit_menu
+from .reply import get_main_menu, MAIN_MENU_BUTTONS
+from .inline import (
+    EntriesPage, get_entries_pager, EditPage, EditEntry, get_edit_picker, get_edit_card_menu,
+)
 
-__all__ = ['get_main_menu', 'get_edit_menu']
+__all__ = [
+    'get_main_menu', 'MAIN_MENU_BUTTONS', 'EntriesPage', 'get_entries_pager',
+    'EditPage', 'EditEntry', 'get_edit_picker', 'get_edit_card_menu',
+]
 
@@ -0,0 +1,88 @@
+# Inline-клавіатури (кнопки під повідомленнями)
+from aiogram.filters.callback_data import CallbackData
+from aiogram.types import InlineKeyboardMarkup, InlineKeyboardButton
+
+# -----------------------------
+# Гортання записів
+# -----------------------------
+class EntriesPage(CallbackData, prefix="entries"):
+    """Дані кнопки гортання записів: напрямок і id-курсор (keyset-пагінація)"""
+    direction: str  # "next" — записи після cursor, "prev" — записи перед cursor
+    cursor: int
+
+
+def get_entries_pager(first_id: int, last_id: int, has_prev: bool, has_next: bool):
+    """
+    Створює кнопки "Назад"/"Далі" під сторінкою записів.
+    :param first_id: id першого запису на сторінці
+    :param last_id: id останнього запису на сторінці
+    :param has_prev: Чи є записи перед сторінкою
+    :param has_next: Чи є записи після сторінки
+    :return: InlineKeyboardMarkup або None, якщо гортати нікуди
+    """
+    buttons = []
+    if has_prev:
+        buttons.append(InlineKeyboardButton(
+            text="⬅️ Назад", callback_data=EntriesPage(direction="prev", cursor=first_id).pack()
+        ))
+    if has_next:
+        buttons.append(InlineKeyboardButton(
+            text="Далі ➡️", callback_data=EntriesPage(direction="next", cursor=last_id).pack()
+        ))
+    return InlineKeyboardMarkup(inline_keyboard=[buttons]) if buttons else None
+
+# -----------------------------
+# Редагування записів
+# -----------------------------
+PICKER_LABEL_LENGTH = 40  # Максимальна довжина підпису кнопки запису
+
+
+class EditPage(CallbackData, prefix="editpage"):
+    """Дані кнопки гортання списку вибору: напрямок і id-курсор (0 — від найновіших)"""
+    direction: str  # "older" — записи перед cursor, "newer" — записи після cursor
+    cursor: int
+
+
+class EditEntry(CallbackData, prefix="edit"):
+    """Дані кнопок картки редагування: дія ("open" — відкрити запис, "cancel" — скасувати)"""
+    action: str
+    entry_id: int = 0
+
+
+def get_edit_picker(entries: list, has_older: bool, has_newer: bool):
+    """
+    Створює список вибору запису для редагування: кнопка на кожен запис, гортання і скасування.
+    :param entries: Записи сторінки (від найновіших)
+    :param has_older: Чи є старіші записи
+    :param has_newer: Чи є новіші записи
+    """
+    rows = []
+    for entry in entries:
+        label = f"🆔 {entry.id} · {entry.name} · {entry.type}"
+        if len(label) > PICKER_LABEL_LENGTH:
+            label = label[:PICKER_LABEL_LENGTH - 1] + "…"
+        rows.append([InlineKeyboardButton(
+            text=label, callback_data=EditEntry(action="open", entry_id=entry.id).pack()
+        )])
+
+    navigation = []
+    if has_newer:
+        navigation.append(InlineKeyboardButton(
+            text="⬅️ Новіші", callback_data=EditPage(direction="newer", cursor=entries[0].id).pack()
+        ))
+    if has_older:
+        navigation.append(InlineKeyboardButton(
+            text="Старіші ➡️", callback_data=EditPage(direction="older", cursor=entries[-1].id).pack()
+        ))
+    if navigation:
+        rows.append(navigation)
+    rows.append([InlineKeyboardButton(text="❌ Скасувати", callback_data=EditEntry(action="cancel").pack())])
+    return InlineKeyboardMarkup(inline_keyboard=rows)
+
+
+def get_edit_card_menu():
+    """Кнопки під карткою редагування: повернення до списку і скасування."""
+    return InlineKeyboardMarkup(inline_keyboard=[[
+        InlineKeyboardButton(text="⬅️ До списку", callback_data=EditPage(direction="older", cursor=0).pack()),
+        InlineKeyboardButton(text="❌ Скасувати", callback_data=EditEntry(action="cancel").pack()),
+    ]])
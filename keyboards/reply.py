@@ -4,33 +4,21 @@ from aiogram.types import ReplyKeyboardMarkup, KeyboardButton
 # -----------------------------
 # Головне меню
 # -----------------------------
+# Кнопки головного меню по рядках (тексти кнопок — це тексти повідомлень, які отримують обробники)
+MAIN_MENU_ROWS = [
+    ["📋 Записи", "🔍 Пошук"],
+    ["✏️ Редагувати", "🔔 Сповіщення"],
+    ["🗂 Дайджест", "ℹ️ Допомога"],
+]
+MAIN_MENU_BUTTONS = frozenset(text for row in MAIN_MENU_ROWS for text in row)
+
+
 def get_main_menu():
     """
     Створює головне меню бота з основними функціями.
     Повертає ReplyKeyboardMarkup з кнопками для навігації.
     """
     return ReplyKeyboardMarkup(
-        keyboard=[
-            [KeyboardButton(text="📋 Записи"), KeyboardButton(text="✏️ Редагувати")],
-            [KeyboardButton(text="🔔 Сповіщення"), KeyboardButton(text="ℹ️ Допомога")]
-        ],
+        keyboard=[[KeyboardButton(text=text) for text in row] for row in MAIN_MENU_ROWS],
         resize_keyboard=True  # Автоматичне підлаштування розміру клавіатури під екран
     )
-
-# -----------------------------
-# Меню редагування
-# -----------------------------
-def get_edit_menu():
-    """
-    Створює меню вибору поля для редагування запису.
-    Повертає ReplyKeyboardMarkup з кнопками полів та скасування.
-    """
-    return ReplyKeyboardMarkup(
-        keyboard=[
-            [KeyboardButton(text="Ім'я"), KeyboardButton(text="Email")],
-            [KeyboardButton(text="Телефон"), KeyboardButton(text="Послуга")],
-            [KeyboardButton(text="❌ Скасувати")]
-        ],
-        resize_keyboard=True  # Автоматичне підлаштування розміру клавіатури під екран
-    )
-
@@ -0,0 +1,85 @@
+# Координація кількох процесів бота через оренди в SQLite
+import asyncio
+import os
+import socket
+from contextlib import asynccontextmanager
+from uuid import uuid4
+from config import LEADER_LEASE
+
+# Унікальний ідентифікатор процесу: хост, PID і випадковий суфікс (PID може повторитись після перезапуску)
+WORKER_ID = f"{socket.gethostname()}:{os.getpid()}:{uuid4().hex[:8]}"
+
+
+@asynccontextmanager
+async def heartbeat(renew, interval: float):
+    """
+    Періодично викликає renew() (async), поки виконується блок with.
+    Використовується для продовження оренди під час тривалої роботи.
+    :param renew: Функція без аргументів, що продовжує оренду
+    :param interval: Інтервал між продовженнями (секунди)
+    """
+    async def beat():
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                await renew()
+            except Exception as e:
+                print(f"Помилка продовження оренди: {e}")
+
+    task = asyncio.create_task(beat())
+    try:
+        yield
+    finally:
+        task.cancel()
+        await asyncio.gather(task, return_exceptions=True)
+
+
+class Lease:
+    """
+    Іменована оренда з терміном дії (таблиця leases).
+    Лише один процес одночасно тримає оренду; якщо він впаде, не звільнивши її,
+    інший процес забере її після закінчення терміну (ttl).
+    """
+
+    def __init__(self, db, name: str, ttl: float = LEADER_LEASE, owner: str = WORKER_ID):
+        """
+        :param db: AsyncDatabase
+        :param name: Назва оренди
+        :param ttl: Термін дії в секундах (продовжується кожні ttl / 3 секунди)
+        :param owner: Ідентифікатор процесу
+        """
+        self.db = db
+        self.name = name
+        self.ttl = ttl
+        self.owner = owner
+
+    async def acquire(self) -> bool:
+        """Бере або продовжує оренду. :return: True, якщо оренда належить цьому процесу"""
+        result = await self.db.acquire_lease(self.name, self.owner, self.ttl)
+        if isinstance(result, str):  # Помилка БД — вважаємо, що оренди немає
+            print(result)
+            return False
+        return result
+
+    async def release(self):
+        """Звільняє оренду, щоб інший процес міг взяти її одразу."""
+        error = await self.db.release_lease(self.name, self.owner)
+        if error:
+            print(error)
+
+    @asynccontextmanager
+    async def hold(self):
+        """
+        Тримає оренду на час блоку with і продовжує її у фоні.
+        Повертає True, якщо оренду отримано, і False, якщо її тримає інший процес:
+            async with lease.hold() as acquired:
+                if acquired: ...
+        """
+        if not await self.acquire():
+            yield False
+            return
+        try:
+            async with heartbeat(self.acquire, self.ttl / 3):
+                yield True
+        finally:
+            await self.release()
@@ -0,0 +1,140 @@
+# Метрики у текстовому форматі Prometheus (без зовнішніх залежностей)
+import threading
+from bisect import bisect_left
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"  # Content-Type відповіді /metrics
+
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+LAG_BUCKETS = (0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 15.0, 60.0, 300.0, 900.0)
+
+_registry: list = []  # Усі створені метрики в порядку оголошення
+
+
+class _Metric:
+    """Базова метрика: значення за набором міток (кортеж значень у порядку labels)."""
+
+    type = ""
+
+    def __init__(self, name: str, description: str, labels: tuple = ()):
+        self.name = name
+        self.description = description
+        self.labels = labels
+        self._values: dict = {}
+        self._lock = threading.Lock()  # Flask обробляє запити в кількох потоках
+        _registry.append(self)
+
+    def _label_str(self, values: tuple, extra: str = "") -> str:
+        """Формує {label="value",...} для рядка експорту."""
+        pairs = [f'{name}="{_escape(value)}"' for name, value in zip(self.labels, values)]
+        if extra:
+            pairs.append(extra)
+        return "{" + ",".join(pairs) + "}" if pairs else ""
+
+    def _samples(self) -> list:
+        raise NotImplementedError
+
+    def render(self) -> str:
+        lines = [f"# HELP {self.name} {self.description}", f"# TYPE {self.name} {self.type}"]
+        lines.extend(self._samples())
+        return "\n".join(lines)
+
+
+class Counter(_Metric):
+    """Лічильник, що лише зростає."""
+
+    type = "counter"
+
+    def inc(self, *labels, amount: float = 1):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def _samples(self) -> list:
+        with self._lock:
+            items = list(self._values.items())
+        return [f"{self.name}{self._label_str(labels)} {value}" for labels, value in items]
+
+
+class Gauge(_Metric):
+    """Поточне значення (може зростати і спадати)."""
+
+    type = "gauge"
+
+    def set(self, value: float, *labels):
+        with self._lock:
+            self._values[labels] = value
+
+    def _samples(self) -> list:
+        with self._lock:
+            items = list(self._values.items())
+        return [f"{self.name}{self._label_str(labels)} {value}" for labels, value in items]
+
+
+class Histogram(_Metric):
+    """
+    Гістограма з фіксованими межами кошиків.
+    observe() — пошук кошика (bisect) і три додавання під блокуванням, без виділення пам'яті
+    для вже відомих міток, тож на гарячому шляху вона майже нічого не коштує.
+    """
+
+    type = "histogram"
+
+    def __init__(self, name: str, description: str, labels: tuple = (), buckets: tuple = LATENCY_BUCKETS):
+        super().__init__(name, description, labels)
+        self.buckets = buckets
+
+    def observe(self, value: float, *labels):
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            state = self._values.get(labels)
+            if state is None:
+                # [лічильники по кошиках (+Inf останній), сума, кількість]
+                state = self._values[labels] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            state[0][index] += 1
+            state[1] += value
+            state[2] += 1
+
+    def _samples(self) -> list:
+        with self._lock:
+            items = [(labels, (list(state[0]), state[1], state[2])) for labels, state in self._values.items()]
+        lines = []
+        for labels, (counts, total, count) in items:
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + ("+Inf",), counts):
+                cumulative += bucket_count
+                bucket_labels = self._label_str(labels, 'le="%s"' % bound)
+                lines.append(f"{self.name}_bucket{bucket_labels} {cumulative}")
+            lines.append(f"{self.name}_sum{self._label_str(labels)} {total}")
+            lines.append(f"{self.name}_count{self._label_str(labels)} {count}")
+        return lines
+
+
+def _escape(value) -> str:
+    """Екранує значення мітки за правилами формату Prometheus."""
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def render() -> str:
+    """Повертає всі метрики процесу у текстовому форматі Prometheus."""
+    return "\n".join(metric.render() for metric in _registry) + "\n"
+
+# -----------------------------
+# Метрики застосунку
+# -----------------------------
+DB_QUERY_SECONDS = Histogram(
+    "db_query_seconds", "Тривалість виклику методу Database (разом з очікуванням підключення)",
+    ("operation", "table"),
+)
+HANDLER_SECONDS = Histogram(
+    "bot_handler_seconds", "Тривалість обробки оновлення обробником aiogram", ("handler", "event"),
+)
+HANDLER_ERRORS = Counter(
+    "bot_handler_errors_total", "Необроблені винятки в обробниках aiogram", ("handler", "event"),
+)
+NOTIFY_SENT = Counter("notifier_sent_total", "Повідомлень, успішно надісланих розсилкою")
+NOTIFY_FAILED = Counter("notifier_failed_total", "Повідомлень, які розсилка не змогла доставити", ("reason",))
+RATE_LIMITED = Counter(
+    "rate_limited_total", "Запитів, відхилених обмеженням частоти (до звернення до БД)", ("scope",),
+)
+NOTIFY_LAG = Histogram(
+    "notifier_lag_seconds", "Час від появи події в outbox до завершення її розсилки", buckets=LAG_BUCKETS,
+)
@@ -0,0 +1,6 @@
+# Експорт middleware
+from .profile import ProfileMiddleware, ProfileCache, UserProfile
+from .metrics import MetricsMiddleware
+from .throttling import ThrottlingMiddleware
+
+__all__ = ['ProfileMiddleware', 'ProfileCache', 'UserProfile', 'MetricsMiddleware', 'ThrottlingMiddleware']
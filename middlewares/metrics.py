@@ -0,0 +1,25 @@
+# Middleware, що вимірює тривалість роботи обробників
+from time import perf_counter
+from aiogram import BaseMiddleware
+from metrics import HANDLER_SECONDS, HANDLER_ERRORS
+
+
+class MetricsMiddleware(BaseMiddleware):
+    """
+    Записує тривалість обробки кожного оновлення в bot_handler_seconds
+    з мітками handler (назва функції-обробника) та event (тип події),
+    а необроблені винятки — в bot_handler_errors_total.
+    """
+
+    async def __call__(self, handler, event, data):
+        handler_object = data.get("handler")
+        name = handler_object.callback.__name__ if handler_object else "unknown"
+        event_type = type(event).__name__
+        started = perf_counter()
+        try:
+            return await handler(event, data)
+        except Exception:
+            HANDLER_ERRORS.inc(name, event_type)
+            raise
+        finally:
+            HANDLER_SECONDS.observe(perf_counter() - started, name, event_type)
@@ -0,0 +1,73 @@
+# Кеш профілів користувачів і middleware, що передає профіль в обробники
+from collections import OrderedDict
+from time import monotonic
+from aiogram import BaseMiddleware
+from config import PROFILE_CACHE_SIZE, PROFILE_CACHE_TTL
+from database import DatabaseError
+from repositories import UserProfile
+
+_MISSING = object()  # Позначка "профілю немає в кеші"
+
+# -----------------------------
+# Кеш профілів
+# -----------------------------
+class ProfileCache:
+    """
+    Обмежений кеш профілів з TTL і витісненням найдавніше використаних (LRU).
+    Зберігає і відсутні профілі (None), щоб незареєстровані чати теж не ходили в БД.
+    """
+
+    def __init__(self, users, max_size: int = PROFILE_CACHE_SIZE, ttl: float = PROFILE_CACHE_TTL):
+        """
+        :param users: AsyncRepository(db, UserRepository), з якого завантажуються профілі
+        :param max_size: Максимальна кількість профілів у пам'яті
+        :param ttl: Скільки секунд профіль вважається актуальним
+        """
+        self.users = users
+        self.max_size = max_size
+        self.ttl = ttl
+        self._items: OrderedDict = OrderedDict()  # chat_id → (час завантаження, профіль)
+
+    async def get(self, chat_id: int):
+        """
+        Повертає профіль користувача (UserProfile) або None, якщо його немає в БД.
+        Звертається до БД лише якщо профілю немає в кеші або він застарів.
+        """
+        cached = self._items.get(chat_id, _MISSING)
+        if cached is not _MISSING and monotonic() - cached[0] < self.ttl:
+            self._items.move_to_end(chat_id)
+            return cached[1]
+
+        try:
+            profile = await self.users.get_profile(chat_id)
+        except DatabaseError as e:  # Помилка БД — не кешуємо
+            print(e)
+            return None
+
+        self._items[chat_id] = (monotonic(), profile)
+        self._items.move_to_end(chat_id)
+        if len(self._items) > self.max_size:
+            self._items.popitem(last=False)  # Витісняємо найдавніше використаний
+        return profile
+
+    def invalidate(self, chat_id: int):
+        """Видаляє профіль з кешу (викликати після зміни рядка users)."""
+        self._items.pop(chat_id, None)
+
+# -----------------------------
+# Middleware
+# -----------------------------
+class ProfileMiddleware(BaseMiddleware):
+    """
+    Завантажує профіль користувача з кешу і передає обробникам аргументи
+    profile (UserProfile або None) та profile_cache (для інвалідації після змін).
+    """
+
+    def __init__(self, cache: ProfileCache):
+        self.cache = cache
+
+    async def __call__(self, handler, event, data):
+        chat = data.get("event_chat")
+        data["profile"] = await self.cache.get(chat.id) if chat else None
+        data["profile_cache"] = self.cache
+        return await handler(event, data)
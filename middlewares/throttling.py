@@ -0,0 +1,39 @@
+# Middleware, що обмежує частоту оновлень від одного чату
+from math import ceil
+from aiogram import BaseMiddleware
+from aiogram.dispatcher.flags import get_flag
+from aiogram.types import Message, CallbackQuery
+from ratelimit import RateLimiter
+
+
+class ThrottlingMiddleware(BaseMiddleware):
+    """
+    Відкидає оновлення від чату, що перевищив ліміт, до завантаження профілю і запитів до БД.
+    Обробник може вказати окреме обмеження прапорцем throttle, наприклад
+    @router.message(..., flags={"throttle": "login"}) для спроб введення пароля.
+    Про відмову користувач дізнається один раз, решта оновлень потоку відкидаються мовчки.
+    """
+
+    def __init__(self, default: RateLimiter, named: dict = None):
+        """
+        :param default: Обмеження для всіх обробників
+        :param named: Обмеження для обробників з прапорцем throttle (назва → RateLimiter)
+        """
+        self.default = default
+        self.named = named or {}
+
+    async def __call__(self, handler, event, data):
+        chat = data.get("event_chat")
+        if not chat:
+            return await handler(event, data)
+
+        limiter = self.named.get(get_flag(data, "throttle"), self.default)
+        retry_after = limiter.hit(chat.id)
+        if not retry_after:
+            return await handler(event, data)
+
+        if limiter.should_notify(chat.id):
+            text = f"⏳ Забагато запитів. Спробуйте через {ceil(retry_after)} с."
+            if isinstance(event, (Message, CallbackQuery)):
+                await event.answer(text)
+        return None
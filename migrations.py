@@ -0,0 +1,229 @@
+# Версійні міграції схеми бази даних
+# Кожна міграція — функція, що отримує курсор і виконується в окремій транзакції.
+# Номер версії = позиція у списку MIGRATIONS; застосована версія зберігається в PRAGMA user_version.
+# Нові міграції лише додаються в кінець списку, існуючі не змінюються.
+
+def _add_column(cursor, table: str, column: str, definition: str):
+    """Додає колонку, якщо її ще немає (для баз, створених до появи міграцій)."""
+    cursor.execute(f"PRAGMA table_info({table})")
+    if column not in [row[1] for row in cursor.fetchall()]:
+        cursor.execute(f"ALTER TABLE {table} ADD COLUMN {column} {definition}")
+
+
+def base_schema(cursor):
+    """Таблиці записів, користувачів бота і службових параметрів"""
+    cursor.execute(
+        "CREATE TABLE IF NOT EXISTS entries ("
+        "id INTEGER PRIMARY KEY AUTOINCREMENT, name TEXT NOT NULL, email TEXT NOT NULL, "
+        "phone TEXT NOT NULL, type TEXT NOT NULL)"
+    )
+    cursor.execute(
+        "CREATE TABLE IF NOT EXISTS users ("
+        "id INTEGER PRIMARY KEY AUTOINCREMENT, chat_id INTEGER UNIQUE, username TEXT, "
+        "registered INTEGER DEFAULT 0, notify INTEGER DEFAULT 0)"
+    )
+    cursor.execute("CREATE TABLE IF NOT EXISTS settings (key TEXT PRIMARY KEY, value TEXT)")
+
+
+def notification_queue(cursor):
+    """Черга сповіщень (outbox) і режим дайджесту"""
+    # outbox — по рядку на кожен новий запис; delivered_at — розіслано миттєві сповіщення,
+    # digested_at — подію включено в дайджест
+    cursor.execute(
+        "CREATE TABLE IF NOT EXISTS outbox ("
+        "id INTEGER PRIMARY KEY AUTOINCREMENT, entry_id INTEGER NOT NULL, created_at REAL NOT NULL, "
+        "claimed_until REAL, delivered_at REAL, digested_at REAL)"
+    )
+    _add_column(cursor, "outbox", "digested_at", "REAL")
+    # Хто вже отримав сповіщення — щоб повторна обробка після збою не надсилала дублікатів
+    cursor.execute(
+        "CREATE TABLE IF NOT EXISTS outbox_deliveries ("
+        "outbox_id INTEGER NOT NULL, chat_id INTEGER NOT NULL, PRIMARY KEY (outbox_id, chat_id))"
+    )
+    # Часткові індекси: у них лише ще не оброблені події, тож вибірка черги не росте з історією
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_outbox_pending ON outbox (id) WHERE delivered_at IS NULL")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_outbox_digest ON outbox (id) WHERE digested_at IS NULL")
+    _add_column(cursor, "users", "digest", "INTEGER DEFAULT 0")  # 0 — миттєві сповіщення, 1 — дайджест
+
+
+# Тригери, що підтримують лічильники entry_stats актуальними
+STATS_TRIGGERS = (
+    """
+CREATE TRIGGER IF NOT EXISTS entry_stats_insert AFTER INSERT ON entries BEGIN
+    INSERT INTO entry_stats (scope, key, count) VALUES ('total', '', 1)
+        ON CONFLICT (scope, key) DO UPDATE SET count = count + 1;
+    INSERT INTO entry_stats (scope, key, count) VALUES ('type', NEW.type, 1)
+        ON CONFLICT (scope, key) DO UPDATE SET count = count + 1;
+    INSERT INTO entry_stats (scope, key, count) VALUES ('day', date('now', 'localtime'), 1)
+        ON CONFLICT (scope, key) DO UPDATE SET count = count + 1;
+END
+    """,
+    """
+CREATE TRIGGER IF NOT EXISTS entry_stats_delete AFTER DELETE ON entries BEGIN
+    UPDATE entry_stats SET count = count - 1 WHERE scope = 'total' AND key = '';
+    UPDATE entry_stats SET count = count - 1 WHERE scope = 'type' AND key = OLD.type;
+END
+    """,
+    """
+CREATE TRIGGER IF NOT EXISTS entry_stats_update AFTER UPDATE OF type ON entries
+WHEN OLD.type IS NOT NEW.type BEGIN
+    UPDATE entry_stats SET count = count - 1 WHERE scope = 'type' AND key = OLD.type;
+    INSERT INTO entry_stats (scope, key, count) VALUES ('type', NEW.type, 1)
+        ON CONFLICT (scope, key) DO UPDATE SET count = count + 1;
+END
+    """,
+)
+
+
+def entry_stats(cursor):
+    """Лічильники записів для /status"""
+    # scope='total' — всього записів, scope='type' — по послугах,
+    # scope='day' — скільки записів надійшло за день (key — дата)
+    cursor.execute(
+        "CREATE TABLE IF NOT EXISTS entry_stats ("
+        "scope TEXT NOT NULL, key TEXT NOT NULL, count INTEGER NOT NULL DEFAULT 0, "
+        "PRIMARY KEY (scope, key)) WITHOUT ROWID"
+    )
+    for trigger in STATS_TRIGGERS:
+        cursor.execute(trigger)
+    cursor.execute("SELECT 1 FROM entry_stats LIMIT 1")
+    if cursor.fetchone() is None:  # Початкові значення з наявних записів
+        cursor.execute("INSERT INTO entry_stats (scope, key, count) SELECT 'total', '', COUNT(*) FROM entries")
+        cursor.execute(
+            "INSERT INTO entry_stats (scope, key, count) SELECT 'type', type, COUNT(*) FROM entries GROUP BY type"
+        )
+
+
+def timestamps_and_indexes(cursor):
+    """Час створення записів та індекси для гарячих запитів"""
+    _add_column(cursor, "entries", "created_at", "REAL")  # Unix-час; у старих записів NULL
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_entries_type ON entries (type)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_entries_created_at ON entries (created_at)")
+    # Частковий покривний індекс для вибірки підписників у сповіщеннях:
+    # SELECT chat_id FROM users WHERE registered = 1 AND notify = 1 AND digest = ?
+    cursor.execute(
+        "CREATE INDEX IF NOT EXISTS idx_users_subscribers ON users (digest, chat_id) "
+        "WHERE registered = 1 AND notify = 1"
+    )
+
+
+def fsm_state(cursor):
+    """Збережені стани FSM (діалоги авторизації та редагування)"""
+    cursor.execute(
+        "CREATE TABLE IF NOT EXISTS fsm_state ("
+        "key TEXT PRIMARY KEY, state TEXT, data TEXT, updated_at REAL NOT NULL) WITHOUT ROWID"
+    )
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_fsm_state_updated_at ON fsm_state (updated_at)")
+
+
+def entries_search(cursor):
+    """Повнотекстовий пошук по записах (FTS5)"""
+    # Індекс без копії даних (content='entries'), з префіксними індексами для пошуку за початком слова
+    cursor.execute(
+        "CREATE VIRTUAL TABLE IF NOT EXISTS entries_fts USING fts5("
+        "name, email, phone, type, content='entries', content_rowid='id', "
+        "tokenize='unicode61 remove_diacritics 2', prefix='2 3')"
+    )
+    cursor.execute(
+        "CREATE TRIGGER IF NOT EXISTS entries_fts_insert AFTER INSERT ON entries BEGIN "
+        "INSERT INTO entries_fts (rowid, name, email, phone, type) "
+        "VALUES (NEW.id, NEW.name, NEW.email, NEW.phone, NEW.type); END"
+    )
+    cursor.execute(
+        "CREATE TRIGGER IF NOT EXISTS entries_fts_delete AFTER DELETE ON entries BEGIN "
+        "INSERT INTO entries_fts (entries_fts, rowid, name, email, phone, type) "
+        "VALUES ('delete', OLD.id, OLD.name, OLD.email, OLD.phone, OLD.type); END"
+    )
+    cursor.execute(
+        "CREATE TRIGGER IF NOT EXISTS entries_fts_update AFTER UPDATE OF name, email, phone, type ON entries BEGIN "
+        "INSERT INTO entries_fts (entries_fts, rowid, name, email, phone, type) "
+        "VALUES ('delete', OLD.id, OLD.name, OLD.email, OLD.phone, OLD.type); "
+        "INSERT INTO entries_fts (rowid, name, email, phone, type) "
+        "VALUES (NEW.id, NEW.name, NEW.email, NEW.phone, NEW.type); END"
+    )
+    cursor.execute("INSERT INTO entries_fts (entries_fts) VALUES ('rebuild')")  # Індексуємо наявні записи
+
+
+def worker_leases(cursor):
+    """Оренди для кількох процесів бота (хто обробляє порцію черги, хто планувальник)"""
+    # Іменовані оренди з терміном дії: власник продовжує її, поки працює, після збою її забирає інший
+    cursor.execute(
+        "CREATE TABLE IF NOT EXISTS leases ("
+        "name TEXT PRIMARY KEY, owner TEXT NOT NULL, expires_at REAL NOT NULL) WITHOUT ROWID"
+    )
+    _add_column(cursor, "outbox", "claimed_by", "TEXT")  # Процес, що обробляє подію
+
+
+def submission_keys(cursor):
+    """Ключі ідемпотентності форми (токен форми та відбиток вмісту)"""
+    # Первинний ключ гарантує, що повторна відправка не створить другий запис навіть з кількох процесів
+    cursor.execute(
+        "CREATE TABLE IF NOT EXISTS submissions (key TEXT PRIMARY KEY, created_at REAL NOT NULL) WITHOUT ROWID"
+    )
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_submissions_created_at ON submissions (created_at)")
+
+
+# Тригери архіву: лічильники entry_stats враховують і перенесені записи, тож перенос
+# (видалення з entries + вставка в entries_archive) не змінює статистику /status
+ARCHIVE_TRIGGERS = (
+    """
+CREATE TRIGGER IF NOT EXISTS entry_stats_archive_insert AFTER INSERT ON entries_archive BEGIN
+    UPDATE entry_stats SET count = count + 1 WHERE scope = 'total' AND key = '';
+    UPDATE entry_stats SET count = count + 1 WHERE scope = 'type' AND key = NEW.type;
+    INSERT INTO entries_archive_fts (rowid, name, email, phone, type)
+        VALUES (NEW.id, NEW.name, NEW.email, NEW.phone, NEW.type);
+END
+    """,
+    """
+CREATE TRIGGER IF NOT EXISTS entry_stats_archive_delete AFTER DELETE ON entries_archive BEGIN
+    UPDATE entry_stats SET count = count - 1 WHERE scope = 'total' AND key = '';
+    UPDATE entry_stats SET count = count - 1 WHERE scope = 'type' AND key = OLD.type;
+    INSERT INTO entries_archive_fts (entries_archive_fts, rowid, name, email, phone, type)
+        VALUES ('delete', OLD.id, OLD.name, OLD.email, OLD.phone, OLD.type);
+END
+    """,
+)
+
+
+def entries_archive(cursor):
+    """Архів старих записів (entries_archive) з повнотекстовим пошуком"""
+    # Записи зберігають свої id (AUTOINCREMENT в entries не видає їх повторно); archived_at — час переносу
+    cursor.execute(
+        "CREATE TABLE IF NOT EXISTS entries_archive ("
+        "id INTEGER PRIMARY KEY, name TEXT NOT NULL, email TEXT NOT NULL, phone TEXT NOT NULL, "
+        "type TEXT NOT NULL, created_at REAL, archived_at REAL NOT NULL)"
+    )
+    cursor.execute(
+        "CREATE VIRTUAL TABLE IF NOT EXISTS entries_archive_fts USING fts5("
+        "name, email, phone, type, content='entries_archive', content_rowid='id', "
+        "tokenize='unicode61 remove_diacritics 2', prefix='2 3')"
+    )
+    for trigger in ARCHIVE_TRIGGERS:
+        cursor.execute(trigger)
+
+
+def entry_versions(cursor):
+    """Версії записів для редагування з перевіркою конкурентних змін"""
+    # Кожна зміна з бота збільшує version; UPDATE ... WHERE version = ? не перезапише чужих змін
+    _add_column(cursor, "entries", "version", "INTEGER NOT NULL DEFAULT 0")
+
+
+def drop_settings(cursor):
+    """Видалення таблиці службових параметрів (settings), яку замінила черга outbox"""
+    cursor.execute("DROP TABLE IF EXISTS settings")
+
+
+# Упорядкований список міграцій: версія N = MIGRATIONS[N - 1]
+MIGRATIONS = [
+    base_schema,
+    notification_queue,
+    entry_stats,
+    timestamps_and_indexes,
+    fsm_state,
+    entries_search,
+    worker_leases,
+    submission_keys,
+    entries_archive,
+    entry_versions,
+    drop_settings,
+]
@@ -0,0 +1,132 @@
+# Обмеження частоти запитів: відро токенів і набір відер за ключем (chat_id, IP-адреса)
+import asyncio
+import threading
+from collections import OrderedDict
+from time import monotonic
+from config import RATE_LIMIT_KEYS
+from metrics import RATE_LIMITED
+
+# -----------------------------
+# Відро токенів
+# -----------------------------
+class TokenBucket:
+    """Класичне відро токенів: rate токенів на секунду, не більше capacity одночасно."""
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = monotonic()
+        self.blocked_until = 0.0  # До цього моменту токени не видаються (див. pause)
+
+    def _refill(self):
+        """Поповнює відро відповідно до часу, що минув."""
+        now = monotonic()
+        self.tokens = min(self.capacity, self.tokens + max(0.0, now - self.updated) * self.rate)
+        self.updated = max(self.updated, now)
+
+    def pause(self, seconds: float):
+        """
+        Зупиняє видачу токенів на seconds секунд (наприклад, на час flood-wait від Telegram)
+        для всіх, хто бере токени з цього відра. Після паузи відро наповнюється з нуля,
+        тож відправка не відновлюється одразу цілою пачкою.
+        """
+        until = monotonic() + seconds
+        if until > self.blocked_until:
+            self.blocked_until = until
+            self.tokens = min(self.tokens, 0.0)
+            self.updated = until
+
+    def try_acquire(self) -> float:
+        """
+        Намагається забрати один токен.
+        :return: 0, якщо токен отримано, інакше — скільки секунд чекати
+        """
+        now = monotonic()
+        if now < self.blocked_until:
+            return self.blocked_until - now
+        self._refill()
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return 0.0
+        return (1 - self.tokens) / self.rate
+
+    def reserve(self) -> float:
+        """
+        Резервує токен, навіть якщо його ще немає (відро йде в борг).
+        Послідовні резервації отримують дедалі більші затримки, тож порядок зберігається.
+        :return: Скільки секунд чекати, доки зарезервований токен стане доступним
+        """
+        self._refill()
+        self.tokens -= 1
+        return 0.0 if self.tokens >= 0 else -self.tokens / self.rate
+
+    def is_full(self) -> bool:
+        """Чи відро повне (тобто ним давно не користувались)."""
+        self._refill()
+        return self.tokens >= self.capacity
+
+    async def acquire(self):
+        """Чекає, доки з'явиться токен, і забирає його."""
+        while (delay := self.try_acquire()) > 0:
+            await asyncio.sleep(delay)
+
+# -----------------------------
+# Обмеження за ключем
+# -----------------------------
+class RateLimiter:
+    """
+    Не більше limit подій за window секунд для кожного ключа (відро токенів на ключ:
+    limit подій можна зробити одразу, далі — по одній кожні window / limit секунд).
+    Перевірка виконується в пам'яті, тож потік відхиляється до звернення до БД чи Telegram.
+    Відра зберігаються в LRU на max_keys ключів: давно неактивні ключі витісняються першими
+    (їхні відра й так уже повні). Потокобезпечний — спільний для потоків Flask і event loop бота.
+    """
+
+    def __init__(self, scope: str, limit: int, window: float, max_keys: int = RATE_LIMIT_KEYS):
+        """
+        :param scope: Назва обмеження (мітка scope у rate_limited_total)
+        :param limit: Скільки подій дозволено за вікно (0 — без обмеження)
+        :param window: Тривалість вікна (секунди)
+        :param max_keys: Максимум ключів у пам'яті
+        """
+        self.scope = scope
+        self.limit = limit
+        self.window = window
+        self.max_keys = max_keys
+        self._items: OrderedDict = OrderedDict()  # ключ → [відро, чи повідомлено про відмову]
+        self._lock = threading.Lock()
+
+    def hit(self, key) -> float:
+        """
+        Зараховує подію для ключа.
+        :return: 0, якщо подію дозволено, інакше — через скільки секунд повторити
+        """
+        if self.limit <= 0:
+            return 0.0
+        with self._lock:
+            item = self._items.get(key)
+            if item is None:
+                item = self._items[key] = [TokenBucket(self.limit / self.window, self.limit), False]
+                if len(self._items) > self.max_keys:
+                    self._items.popitem(last=False)  # Витісняємо найдавніше активний ключ
+            else:
+                self._items.move_to_end(key)
+            retry_after = item[0].try_acquire()
+            if not retry_after:
+                item[1] = False
+        if retry_after:
+            RATE_LIMITED.inc(self.scope)
+        return retry_after
+
+    def should_notify(self, key) -> bool:
+        """
+        Чи варто повідомити про відмову: True лише для першої відмови поспіль,
+        щоб відповіді на потік запитів самі не створювали потоку.
+        """
+        with self._lock:
+            item = self._items.get(key)
+            if item is None or item[1]:
+                return False
+            item[1] = True
+            return True
@@ -0,0 +1,47 @@
+# Локальна перевірка вебхука: надсилає записані оновлення Telegram на вбудований сервер бота
+# Використання: BOT_MODE=webhook python bot.py, потім python replay_updates.py updates.jsonl
+import asyncio
+import json
+import sys
+from time import monotonic
+from aiohttp import ClientSession
+from config import WEBHOOK_PORT, WEBHOOK_PATH, WEBHOOK_SECRET
+from webhook import SECRET_HEADER
+
+
+async def replay(path: str, url: str, concurrency: int):
+    """
+    Надсилає оновлення з JSONL-файлу (по одному JSON-об'єкту Update в рядку) на вебхук.
+    :param path: Шлях до файлу з оновленнями
+    :param url: Адреса вебхука
+    :param concurrency: Скільки запитів надсилати одночасно
+    """
+    with open(path, encoding="utf-8") as file:
+        updates = [json.loads(line) for line in file if line.strip()]
+
+    limit = asyncio.Semaphore(concurrency)
+    headers = {SECRET_HEADER: WEBHOOK_SECRET} if WEBHOOK_SECRET else {}
+
+    async with ClientSession(headers=headers) as session:
+        async def post(update: dict):
+            async with limit:
+                async with session.post(url, json=update) as response:
+                    if response.status != 200:
+                        print(f"Оновлення {update.get('update_id')}: HTTP {response.status}")
+
+        started = monotonic()
+        await asyncio.gather(*(post(update) for update in updates))
+        elapsed = monotonic() - started
+
+    print(f"📨 Надіслано {len(updates)} оновлень за {elapsed:.2f} с")
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2:
+        print("Використання: python replay_updates.py updates.jsonl [concurrency]")
+        sys.exit(1)
+    asyncio.run(replay(
+        sys.argv[1],
+        f"http://127.0.0.1:{WEBHOOK_PORT}{WEBHOOK_PATH}",
+        int(sys.argv[2]) if len(sys.argv) > 2 else 10,
+    ))
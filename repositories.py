@@ -0,0 +1,209 @@
+# Типізовані запити до таблиць entries та users
+from collections import namedtuple
+from functools import lru_cache
+from itertools import chain
+from database import Database
+
+# -----------------------------
+# Рядки
+# -----------------------------
+# Запис клієнта; позиційний доступ (entry[1]) теж працює, тож format_entry* приймають і Entry
+Entry = namedtuple("Entry", ["id", "name", "email", "phone", "type", "created_at"])
+
+# Запис з версією рядка — для редагування з перевіркою конкурентних змін
+VersionedEntry = namedtuple("VersionedEntry", Entry._fields + ("version",))
+
+# Профіль користувача бота
+UserProfile = namedtuple("UserProfile", ["registered", "notify", "digest"])
+
+
+def _factory(row_type):
+    """row_factory для sqlite3, що створює row_type без проміжного словника."""
+    make = row_type._make
+    return lambda cursor, row: make(row)
+
+
+def _scalar(cursor, row):
+    """row_factory, що повертає перше значення рядка."""
+    return row[0]
+
+
+ENTRY_ROW = _factory(Entry)
+VERSIONED_ENTRY_ROW = _factory(VersionedEntry)
+PROFILE_ROW = _factory(UserProfile)
+
+ENTRY_COLUMNS = "id, name, email, phone, type, created_at"
+EDITABLE_FIELDS = ("name", "email", "phone", "type")  # Поля запису, які можна змінювати з бота
+
+
+@lru_cache(maxsize=None)
+def _update_sql(fields: tuple) -> str:
+    """Текст UPDATE для набору полів (незмінний для кожного набору, тож кешується і в cached_statements)."""
+    assignments = ", ".join(f"{field} = ?" for field in fields)
+    return f"UPDATE entries SET {assignments}, version = version + 1 WHERE id = ? AND version = ?"
+
+# -----------------------------
+# Записи
+# -----------------------------
+class EntryRepository:
+    """
+    Запити до таблиці entries. Тексти SQL незмінні, тож кожен компілюється один раз
+    на підключення (кеш cached_statements). Помилки БД — DatabaseError.
+    Перегляд і редагування працюють лише з робочою таблицею entries; пошук і повне
+    вивантаження охоплюють і архів entries_archive (див. Database.archive_entries).
+    """
+
+    GET_VERSIONED = f"SELECT {ENTRY_COLUMNS}, version FROM entries WHERE id = ?"
+    HAS_BEFORE = "SELECT 1 FROM entries WHERE id < ? LIMIT 1"
+    HAS_AFTER = "SELECT 1 FROM entries WHERE id > ? LIMIT 1"
+    PAGE_AFTER = f"SELECT {ENTRY_COLUMNS} FROM entries WHERE id > ? ORDER BY id LIMIT ?"
+    PAGE_BEFORE = f"SELECT {ENTRY_COLUMNS} FROM entries WHERE id < ? ORDER BY id DESC LIMIT ?"
+    ALL = f"SELECT {ENTRY_COLUMNS} FROM entries ORDER BY id"
+    SEARCH = (
+        "SELECT e.id, e.name, e.email, e.phone, e.type, e.created_at FROM entries_fts f "
+        "JOIN entries e ON e.id = f.rowid WHERE entries_fts MATCH ? ORDER BY f.rank LIMIT ?"
+    )
+    ARCHIVE_ALL = f"SELECT {ENTRY_COLUMNS} FROM entries_archive ORDER BY id"
+    ARCHIVE_SEARCH = (
+        "SELECT e.id, e.name, e.email, e.phone, e.type, e.created_at FROM entries_archive_fts f "
+        "JOIN entries_archive e ON e.id = f.rowid WHERE entries_archive_fts MATCH ? ORDER BY f.rank LIMIT ?"
+    )
+
+    def __init__(self, db: Database):
+        self.db = db
+
+    def get_versioned(self, entry_id: int):
+        """Повертає VersionedEntry (запис з поточною версією) або None, якщо запису немає."""
+        return self.db.fetch_one(self.GET_VERSIONED, (entry_id,), VERSIONED_ENTRY_ROW)
+
+    def has_before(self, entry_id: int) -> bool:
+        """Чи є записи з id меншим за entry_id (для кнопки "⬅️ Назад")."""
+        return self.db.fetch_one(self.HAS_BEFORE, (entry_id,)) is not None
+
+    def has_after(self, entry_id: int) -> bool:
+        """Чи є записи з id більшим за entry_id (для кнопки "Далі ➡️")."""
+        return self.db.fetch_one(self.HAS_AFTER, (entry_id,)) is not None
+
+    def page_after(self, last_id: int, limit: int) -> list:
+        """Записи з id > last_id за зростанням id (keyset-пагінація)."""
+        return self.db.fetch_all(self.PAGE_AFTER, (last_id, limit), ENTRY_ROW)
+
+    def page_before(self, before_id: int, limit: int) -> list:
+        """Записи з id < before_id, від найближчих до before_id."""
+        return self.db.fetch_all(self.PAGE_BEFORE, (before_id, limit), ENTRY_ROW)
+
+    def search(self, text: str, limit: int) -> list:
+        """
+        Повнотекстовий пошук (entries_fts): кожне слово шукається за початком, мають збігтися всі.
+        Архів (entries_archive_fts) переглядається, лише якщо в робочій таблиці знайдено менше limit.
+        :return: Список Entry, найрелевантніші першими (спершу з робочої таблиці, потім з архіву)
+        """
+        # Кожне слово береться в лапки, щоб символи на кшталт "+", "@" чи "-" не сприймались як синтаксис FTS5
+        terms = ['"' + term.replace('"', '""') + '"*' for term in text.split()]
+        if not terms:
+            return []
+        query = " ".join(terms)
+        found = self.db.fetch_all(self.SEARCH, (query, limit), ENTRY_ROW)
+        if len(found) < limit:
+            found += self.db.fetch_all(self.ARCHIVE_SEARCH, (query, limit - len(found)), ENTRY_ROW)
+        return found
+
+    def update_fields(self, entry_id: int, version: int, changes: dict) -> bool:
+        """
+        Змінює кілька полів запису одним UPDATE, якщо запис не змінювали після читання версії
+        (оптимістичне блокування). Кожна зміна збільшує версію.
+        :param version: Версія з get_versioned
+        :param changes: Поле (одне з EDITABLE_FIELDS) → нове значення
+        :return: True, якщо зміни записано; False, якщо запис змінено іншим або його вже немає
+        :raises ValueError: якщо поле не можна змінювати
+        """
+        fields = tuple(sorted(changes))
+        invalid = [field for field in fields if field not in EDITABLE_FIELDS]
+        if invalid or not fields:
+            raise ValueError(f"Поля {', '.join(invalid)} не можна змінювати")
+        params = tuple(changes[field] for field in fields) + (entry_id, version)
+        return self.db.execute(_update_sql(fields), params) > 0
+
+    def iter_all(self, batch_size: int = 500, archive: bool = True):
+        """
+        Генератор усіх записів (Entry), що читає їх порціями: спершу архів, потім робоча таблиця,
+        кожна за зростанням id.
+        :param archive: Чи включати записи з архіву
+        """
+        current = self.db.iterate(self.ALL, (), ENTRY_ROW, batch_size)
+        if not archive:
+            return current
+        return chain(self.db.iterate(self.ARCHIVE_ALL, (), ENTRY_ROW, batch_size), current)
+
+# -----------------------------
+# Користувачі бота
+# -----------------------------
+class UserRepository:
+    """Запити до таблиці users (профілі та налаштування сповіщень)."""
+
+    PROFILE = "SELECT registered, notify, digest FROM users WHERE chat_id = ?"
+    CREATE = "INSERT OR IGNORE INTO users (chat_id, username, registered, notify) VALUES (?, ?, 0, 0)"
+    SET_REGISTERED = "UPDATE users SET registered = ? WHERE chat_id = ?"
+    SET_NOTIFY = "UPDATE users SET notify = ? WHERE chat_id = ?"
+    SET_DIGEST = "UPDATE users SET digest = ? WHERE chat_id = ?"
+    SUBSCRIBERS = "SELECT chat_id FROM users WHERE registered = 1 AND notify = 1 AND digest = ?"
+
+    def __init__(self, db: Database):
+        self.db = db
+
+    def get_profile(self, chat_id: int):
+        """Повертає UserProfile або None, якщо користувача немає."""
+        return self.db.fetch_one(self.PROFILE, (chat_id,), PROFILE_ROW)
+
+    def create(self, chat_id: int, username: str):
+        """Додає неавторизованого користувача (якщо його ще немає)."""
+        self.db.execute(self.CREATE, (chat_id, username))
+
+    def set_registered(self, chat_id: int, registered: bool = True):
+        """Позначає користувача авторизованим (після правильного пароля)."""
+        self.db.execute(self.SET_REGISTERED, (int(registered), chat_id))
+
+    def set_notify(self, chat_id: int, notify: bool):
+        """Вмикає або вимикає сповіщення."""
+        self.db.execute(self.SET_NOTIFY, (int(notify), chat_id))
+
+    def set_digest(self, chat_id: int, digest: bool):
+        """Перемикає режим сповіщень: миттєві або дайджест."""
+        self.db.execute(self.SET_DIGEST, (int(digest), chat_id))
+
+    def subscribers(self, digest: bool) -> list:
+        """chat_id авторизованих користувачів з увімкненими сповіщеннями у вказаному режимі."""
+        return self.db.fetch_all(self.SUBSCRIBERS, (int(digest),), _scalar)
+
+# -----------------------------
+# Асинхронний доступ
+# -----------------------------
+class AsyncRepository:
+    """
+    Асинхронна обгортка над репозиторієм для коду в event loop:
+    кожен метод виконується в потоці запитів AsyncDatabase.
+        entries = AsyncRepository(db, EntryRepository)
+        entry = await entries.get_versioned(5)
+    """
+
+    def __init__(self, db, repository_class):
+        """
+        :param db: AsyncDatabase
+        :param repository_class: EntryRepository або UserRepository
+        """
+        self._db = db
+        self._repository = repository_class(db.sync)
+
+    def __getattr__(self, name: str):
+        method = getattr(self._repository, name, None)
+        if method is None or name.startswith("_") or not callable(method):
+            raise AttributeError(name)
+
+        async def call(*args, **kwargs):
+            return await self._db.run(method, *args, **kwargs)
+
+        call.__name__ = name
+        call.__doc__ = method.__doc__
+        setattr(self, name, call)  # Кешуємо, щоб не створювати обгортку при кожному виклику
+        return call
+
@@ -1,29 +1,59 @@
-from flask import Flask, render_template, request
-from database import Database
-from config import DATABASE
-
-app = Flask(__name__)
-db = Database(DATABASE)
-
-# Створюємо таблицю записів (один раз)
-db.create_table(
-    "entries",
-    ["id", "name", "email", "phone", "type"],
-    ["INTEGER PRIMARY KEY AUTOINCREMENT", "TEXT NOT NULL", "TEXT NOT NULL", "TEXT NOT NULL", "TEXT NOT NULL"]
-)
-
-# Створюємо таблицю користувачів бота (один раз)
-db.create_table(
-    "users",
-    ["id", "chat_id", "username", "registered", "notify"],
-    ["INTEGER PRIMARY KEY AUTOINCREMENT", "INTEGER UNIQUE", "TEXT", "INTEGER DEFAULT 0", "INTEGER DEFAULT 0"]
-)
-
-@app.route('/')
+import atexit
+from math import ceil
+from time import time
+from uuid import uuid4
+from flask import Blueprint, Flask, current_app, render_template, request, jsonify
+from container import AppContainer
+from database import DUPLICATE_ENTRY
+from events import publish_new_entry
+from dedup import submission_keys
+from metrics import render as render_metrics, CONTENT_TYPE as METRICS_CONTENT_TYPE
+
+routes = Blueprint("form", __name__)
+
+
+def get_container() -> AppContainer:
+    """
+    Повертає контейнер ресурсів поточного застосунку (app.extensions).
+    Під час першого запиту оновлює схему бази даних (див. migrations.py).
+    """
+    container = current_app.extensions["container"]
+    container.open()
+    return container
+
+
+def create_app(container: AppContainer = None) -> Flask:
+    """
+    Створює застосунок Flask. Підключення до БД відкриваються лише під час першого запиту.
+    :param container: Контейнер ресурсів (за замовчуванням — новий для DATABASE)
+    """
+    container = container or AppContainer()
+    app = Flask(__name__)
+    app.extensions["container"] = container
+    app.register_blueprint(routes)
+    atexit.register(container.close)  # Дописуємо групові коміти і закриваємо підключення при виході
+    return app
+
+@routes.before_request
+def limit_submissions():
+    """
+    Обмежує кількість відправок форми з однієї IP-адреси (SUBMIT_RATE_LIMIT за SUBMIT_RATE_WINDOW).
+    Надлишкові запити відхиляються в пам'яті — без запису в БД і сповіщень у Telegram.
+    За зворотним проксі адреса клієнта береться з X-Forwarded-For лише після werkzeug ProxyFix.
+    """
+    if request.endpoint != "form.submit":
+        return None
+    retry_after = get_container().submit_limiter.hit(request.remote_addr)
+    if retry_after:
+        return "❌ Забагато відправок, спробуйте пізніше.", 429, {"Retry-After": str(ceil(retry_after))}
+    return None
+
+@routes.route('/')
 def home():
-    return render_template('form.html')
+    # Одноразовий токен форми: повторна відправка тієї ж форми не створить другий запис
+    return render_template('form.html', token=uuid4().hex)
 
-@app.route('/submit', methods=['POST'])
+@routes.route('/submit', methods=['POST'])
 def submit():
     """Обробка форми та запис у базу"""
     name = request.form.get('name')
@@ -32,8 +62,36 @@ def submit():
     type_ = request.form.get('type')
     if not (name and email and phone and type_):
         return "❌ Будь ласка, заповніть усі поля!"
-    db.insert_data("entries", ["name", "email", "phone", "type"], (name, email, phone, type_))
+
+    # Повторна відправка (подвійне натискання, повтор запиту) — відповідаємо так само, але нічого не пишемо
+    container = get_container()
+    keys = submission_keys(request.form.get('token', ''), email, phone, type_)
+    if container.recent_submissions.seen(keys):
+        return "✅ Дані успішно додані!"
+    error = (container.writer or container.db).insert_data(
+        "entries", ["name", "email", "phone", "type", "created_at"], (name, email, phone, type_, time()),
+        outbox=True, dedup=keys
+    )
+    if error == DUPLICATE_ENTRY:  # Ключ уже є в БД (інший процес або кеш його забув)
+        return "✅ Дані успішно додані!"
+    if error:
+        return "❌ Не вдалося зберегти дані, спробуйте пізніше."
+    container.recent_submissions.add(keys)
+    publish_new_entry()  # Миттєво повідомляємо бота про новий запис
     return "✅ Дані успішно додані!"
 
+@routes.route('/stats/writer')
+def writer_stats():
+    """Лічильники групового коміту (розмір порцій, затримки) для налаштування"""
+    writer = get_container().writer
+    return jsonify(writer.stats() if writer else {"enabled": False})
+
+@routes.route('/metrics')
+def metrics():
+    """Метрики веб-сервера (тривалість запитів до БД) у форматі Prometheus"""
+    return render_metrics(), 200, {"Content-Type": METRICS_CONTENT_TYPE}
+
+app = create_app()  # Для запуску python server.py і WSGI-серверів (server:app)
+
 if __name__ == '__main__':
     app.run(debug=True)
@@ -1,5 +1,6 @@
 # Експорт станів FSM
-from .user_states import AuthState, EditState
+from .user_states import AuthState, EditState, SearchState
+from .storage import SQLiteStorage
 
-__all__ = ['AuthState', 'EditState']
+__all__ = ['AuthState', 'EditState', 'SearchState', 'SQLiteStorage']
 
@@ -0,0 +1,95 @@
+# Сховище станів FSM у SQLite (переживає перезапуск бота)
+import json
+from collections import OrderedDict
+from time import time
+from aiogram.fsm.state import State
+from aiogram.fsm.storage.base import BaseStorage, StorageKey
+from config import FSM_CACHE_SIZE, FSM_STATE_TTL
+
+PURGE_INTERVAL = 3600  # Як часто видаляти застарілі стани з БД (секунди)
+
+
+class SQLiteStorage(BaseStorage):
+    """
+    Сховище станів FSM у таблиці fsm_state існуючої бази даних.
+    Записи проходять крізь кеш у пам'яті одразу в БД (write-through), тож читання стану
+    не звертається до БД, а перезапуск чи деплой не скидає користувачів посеред діалогу.
+    Стани, які не змінювались довше за FSM_STATE_TTL, вважаються застарілими і видаляються.
+    Кеш належить процесу: якщо ботів кілька, оновлення одного чату мають надходити
+    до того самого процесу (або кеш слід вимкнути через FSM_CACHE_SIZE=0).
+    """
+
+    def __init__(self, db, cache_size: int = FSM_CACHE_SIZE, ttl: float = FSM_STATE_TTL):
+        """
+        :param db: AsyncDatabase, у якій зберігаються стани
+        :param cache_size: Максимальна кількість станів у кеші
+        :param ttl: Через скільки секунд без змін стан вважається застарілим
+        """
+        self.db = db
+        self.cache_size = cache_size
+        self.ttl = ttl
+        self._cache: OrderedDict = OrderedDict()  # ключ → [стан, дані, час зміни]
+        self._next_purge = 0.0
+
+    @staticmethod
+    def _key(key: StorageKey) -> str:
+        """Компактний рядковий ключ для таблиці fsm_state."""
+        return ":".join(str(part) if part is not None else "" for part in (
+            key.bot_id, key.chat_id, key.user_id, key.thread_id, key.business_connection_id, key.destiny
+        ))
+
+    async def _load(self, key: str) -> list:
+        """Повертає запис [стан, дані, час зміни] з кешу або з БД."""
+        record = self._cache.get(key)
+        if record is None:
+            row = await self.db.load_fsm(key)
+            record = [row[0], json.loads(row[1]) if row[1] else {}, row[2]] if row else [None, {}, time()]
+            self._remember(key, record)
+        else:
+            self._cache.move_to_end(key)
+
+        if record[0] is not None or record[1]:
+            if time() - record[2] > self.ttl:  # Застарілий стан — починаємо з чистого аркуша
+                record[:] = [None, {}, time()]
+                await self.db.save_fsm(key, None, None)
+        return record
+
+    def _remember(self, key: str, record: list):
+        """Кладе запис у кеш, витісняючи найдавніше використаний."""
+        if self.cache_size <= 0:
+            return
+        self._cache[key] = record
+        self._cache.move_to_end(key)
+        if len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+
+    async def _save(self, key: str, record: list):
+        """Зберігає запис у БД (порожній запис видаляється) і періодично чистить застарілі."""
+        record[2] = time()
+        self._remember(key, record)
+        data = json.dumps(record[1], ensure_ascii=False) if record[1] else None
+        await self.db.save_fsm(key, record[0], data)
+        if record[2] > self._next_purge:
+            self._next_purge = record[2] + PURGE_INTERVAL
+            await self.db.purge_fsm(self.ttl)
+
+    async def set_state(self, key: StorageKey, state=None) -> None:
+        storage_key = self._key(key)
+        record = await self._load(storage_key)
+        record[0] = state.state if isinstance(state, State) else state
+        await self._save(storage_key, record)
+
+    async def get_state(self, key: StorageKey):
+        return (await self._load(self._key(key)))[0]
+
+    async def set_data(self, key: StorageKey, data) -> None:
+        storage_key = self._key(key)
+        record = await self._load(storage_key)
+        record[1] = dict(data)
+        await self._save(storage_key, record)
+
+    async def get_data(self, key: StorageKey) -> dict:
+        return dict((await self._load(self._key(key)))[1])
+
+    async def close(self) -> None:
+        self._cache.clear()
@@ -13,7 +13,11 @@ class AuthState(StatesGroup):
 # -----------------------------
 class EditState(StatesGroup):
     """Група станів для процесу редагування записів"""
-    waiting_id = State()      # Стан очікування ID запису для редагування
-    waiting_field = State()   # Стан очікування вибору поля для редагування
-    waiting_value = State()   # Стан очікування нового значення поля
+    waiting_changes = State()  # Стан очікування нових значень полів (картка запису відкрита)
 
+# -----------------------------
+# Стани пошуку
+# -----------------------------
+class SearchState(StatesGroup):
+    """Група станів для пошуку записів"""
+    waiting_query = State()   # Стан очікування тексту запиту
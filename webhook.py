@@ -0,0 +1,117 @@
+# Отримання оновлень через вебхук (вбудований aiohttp-сервер) як альтернатива long polling
+import asyncio
+from aiohttp import web
+from aiogram import Bot, Dispatcher
+from aiogram.types import Update
+from config import (
+    WEBHOOK_URL, WEBHOOK_PATH, WEBHOOK_HOST, WEBHOOK_PORT, WEBHOOK_SECRET, WEBHOOK_MAX_INFLIGHT,
+    METRICS_HOST, METRICS_PORT,
+)
+from metrics import render as render_metrics, CONTENT_TYPE as METRICS_CONTENT_TYPE
+
+SECRET_HEADER = "X-Telegram-Bot-Api-Secret-Token"  # Заголовок, яким Telegram передає секрет вебхука
+
+
+async def metrics(request: web.Request) -> web.Response:
+    """Метрики процесу бота у форматі Prometheus."""
+    return web.Response(body=render_metrics().encode(), headers={"Content-Type": METRICS_CONTENT_TYPE})
+
+
+async def start_metrics_server():
+    """
+    Запускає окремий HTTP-сервер з /metrics на METRICS_HOST:METRICS_PORT (для режиму polling;
+    у режимі вебхука /metrics доступний на сервері вебхука).
+    :return: AppRunner для зупинки або None, якщо METRICS_PORT = 0 чи порт зайнятий
+    """
+    if not METRICS_PORT:
+        return None
+    app = web.Application()
+    app.router.add_get("/metrics", metrics)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    try:
+        await web.TCPSite(runner, METRICS_HOST, METRICS_PORT).start()
+    except OSError as e:
+        print(f"Не вдалося запустити /metrics: {e}")
+        await runner.cleanup()
+        return None
+    print(f"📊 Метрики: http://{METRICS_HOST}:{METRICS_PORT}/metrics")
+    return runner
+
+
+def create_app(dp: Dispatcher, bot: Bot, max_inflight: int = WEBHOOK_MAX_INFLIGHT,
+               secret: str = WEBHOOK_SECRET) -> web.Application:
+    """
+    Створює aiohttp-застосунок, що приймає оновлення за адресою WEBHOOK_PATH.
+    Кожне оновлення обробляється окремою задачею одразу після отримання; одночасно
+    обробляється не більше max_inflight оновлень — понад це запит чекає на вільне місце,
+    і Telegram автоматично сповільнює доставку.
+    :param dp: Диспетчер з підключеними роутерами
+    :param bot: Екземпляр бота
+    :param max_inflight: Ліміт одночасно оброблюваних оновлень
+    :param secret: Секрет вебхука (порожній — без перевірки, для локального тестування)
+    """
+    inflight = asyncio.Semaphore(max_inflight)
+    tasks: set = set()  # Посилання на задачі, щоб їх не прибрав збирач сміття
+
+    async def process(update: Update):
+        """Передає оновлення диспетчеру і звільняє місце після обробки."""
+        try:
+            await dp.feed_update(bot, update)
+        except Exception as e:
+            print(f"Помилка обробки оновлення {update.update_id}: {e}")
+        finally:
+            inflight.release()
+
+    async def handle(request: web.Request) -> web.Response:
+        """Приймає оновлення від Telegram і ставить його в обробку."""
+        if secret and request.headers.get(SECRET_HEADER) != secret:
+            return web.Response(status=401)
+        try:
+            update = Update.model_validate(await request.json(), context={"bot": bot})
+        except Exception:
+            return web.Response(status=400)
+
+        await inflight.acquire()
+        task = asyncio.create_task(process(update))
+        tasks.add(task)
+        task.add_done_callback(tasks.discard)
+        return web.Response()
+
+    async def drain(app: web.Application):
+        """Чекає на завершення оновлень, що вже обробляються."""
+        if tasks:
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+    app = web.Application()
+    app.router.add_post(WEBHOOK_PATH, handle)
+    app.router.add_get("/metrics", metrics)
+    app.on_shutdown.append(drain)
+    return app
+
+
+async def run_webhook(dp: Dispatcher, bot: Bot):
+    """
+    Запускає вебхук-сервер на WEBHOOK_HOST:WEBHOOK_PORT і працює до зупинки.
+    Якщо WEBHOOK_URL задано — реєструє вебхук у Telegram; якщо ні — лише слухає локально
+    (для тестування, наприклад, через replay_updates.py).
+    """
+    runner = web.AppRunner(create_app(dp, bot))
+    await runner.setup()
+    await web.TCPSite(runner, WEBHOOK_HOST, WEBHOOK_PORT).start()
+
+    if WEBHOOK_URL:
+        await bot.set_webhook(
+            WEBHOOK_URL.rstrip("/") + WEBHOOK_PATH,
+            secret_token=WEBHOOK_SECRET or None,
+            max_connections=min(WEBHOOK_MAX_INFLIGHT, 100),
+            drop_pending_updates=True,
+        )
+    await dp.emit_startup(bot=bot, dispatcher=dp, **dp.workflow_data)
+    print(f"🌐 Вебхук слухає http://{WEBHOOK_HOST}:{WEBHOOK_PORT}{WEBHOOK_PATH}")
+
+    try:
+        await asyncio.Event().wait()  # Працюємо, доки задачу не скасують (Ctrl+C)
+    finally:
+        await dp.emit_shutdown(bot=bot, dispatcher=dp, **dp.workflow_data)
+        await runner.cleanup()